@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from recipes.admin_utils import ScalableAdmin, input_filter
+from .models import ActivityRollup
+
+
+class ActivityRollupAdmin(ScalableAdmin):
+    list_display = ('day', 'kind', 'target_id', 'added', 'removed')
+    list_filter = ('kind', input_filter('target', 'объекту'))
+
+
+admin.site.register(ActivityRollup, ActivityRollupAdmin)
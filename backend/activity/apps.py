@@ -0,0 +1,17 @@
+import atexit
+
+from django.apps import AppConfig
+from django.core.signals import request_finished
+
+
+class ActivityConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'activity'
+
+    def ready(self):
+        from activity.buffer import event_buffer
+
+        request_finished.connect(
+            event_buffer.flush_if_due, dispatch_uid='activity_flush'
+        )
+        atexit.register(event_buffer.flush)
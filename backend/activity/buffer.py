@@ -0,0 +1,66 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from live.events import publish, user_channel
+from .models import ActivityEvent
+
+
+class EventBuffer:
+    """
+    Буфер событий внутри процесса.
+
+    События попадают в буфер только после фиксации транзакции и
+    записываются одним bulk_create, когда буфер заполнен или с прошлой
+    записи прошло ACTIVITY_FLUSH_INTERVAL секунд.
+    """
+
+    def __init__(self, max_size, interval):
+        self.max_size = max_size
+        self.interval = interval
+        self._events = []
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.max_size
+        if full:
+            self.flush()
+
+    def flush_if_due(self, **kwargs):
+        if self._events and (
+            time.monotonic() - self._flushed >= self.interval
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+            self._flushed = time.monotonic()
+        if events:
+            ActivityEvent.objects.bulk_create(
+                events, batch_size=self.max_size
+            )
+
+
+event_buffer = EventBuffer(
+    settings.ACTIVITY_FLUSH_SIZE, settings.ACTIVITY_FLUSH_INTERVAL
+)
+
+
+def record_event(kind, user_id, target_id, delta):
+    now = timezone.now()
+    event = ActivityEvent(
+        kind=kind, user_id=user_id, target_id=target_id, delta=delta,
+        day=timezone.localdate(now), created=now,
+    )
+    transaction.on_commit(lambda: event_buffer.append(event))
+    publish(
+        user_channel(user_id), kind,
+        {'target': target_id, 'delta': delta},
+    )
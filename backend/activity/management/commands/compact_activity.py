@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from activity.rollups import compact, purge
+
+
+class Command(BaseCommand):
+    help = "roll up activity events into daily totals"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int,
+            default=settings.ACTIVITY_RETENTION_DAYS,
+        )
+
+    def handle(self, *args, **options):
+        rollups = compact()
+        deleted = purge(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Итогов записано: {rollups}, старых событий удалено: {deleted}'
+        ))
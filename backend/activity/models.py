@@ -0,0 +1,66 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ActivityKind(models.TextChoices):
+    FAVORITE = 'favorite', 'Избранное'
+    SHOPPING_CART = 'shopping_cart', 'Список покупок'
+    SUBSCRIPTION = 'subscription', 'Подписка'
+
+
+class ActivityEvent(models.Model):
+    """
+    Неизменяемый журнал добавлений (+1) и удалений (-1).
+
+    Ссылки на пользователя и объект хранятся без внешних ключей: вставка
+    не проверяет и не блокирует рабочие таблицы, а удаление рецепта или
+    пользователя не переписывает историю. Таблица не партиционирована:
+    compact_activity сворачивает события в дневные итоги и удаляет дни
+    старше ACTIVITY_RETENTION_DAYS, выбирая их по индексу (day, kind).
+    """
+
+    kind = models.CharField(
+        max_length=16,
+        choices=ActivityKind.choices,
+    )
+    user_id = models.BigIntegerField()
+    target_id = models.BigIntegerField()
+    delta = models.SmallIntegerField()
+    day = models.DateField()
+    created = models.DateTimeField(
+        default=timezone.now,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'kind'], name='activity_day_kind_idx'),
+        ]
+
+
+class ActivityRollup(models.Model):
+    """Дневные итоги по объекту; аналитика читает только эту таблицу."""
+
+    day = models.DateField()
+    kind = models.CharField(
+        max_length=16,
+        choices=ActivityKind.choices,
+    )
+    target_id = models.BigIntegerField()
+    added = models.PositiveIntegerField(
+        default=0,
+    )
+    removed = models.PositiveIntegerField(
+        default=0,
+    )
+
+    class Meta:
+        ordering = ('-day', )
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'kind', 'target_id'],
+                name='unique_activity_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'day'], name='rollup_kind_day_idx'),
+        ]
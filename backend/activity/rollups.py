@@ -0,0 +1,53 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import ActivityEvent, ActivityRollup
+
+
+def compact(until=None):
+    """
+    Пересчитывает дневные итоги за завершённые дни, начиная с последнего
+    свёрнутого: события, записанные из буфера с опозданием, попадают в
+    итоги при следующем запуске.
+    """
+    until = until or timezone.localdate()
+    last_day = ActivityRollup.objects.aggregate(day=Max('day'))['day']
+    events = ActivityEvent.objects.filter(day__lt=until)
+    if last_day is not None:
+        events = events.filter(day__gte=last_day)
+    rows = (
+        events.values('day', 'kind', 'target_id')
+        .annotate(
+            added=Count('id', filter=Q(delta__gt=0)),
+            removed=Count('id', filter=Q(delta__lt=0)),
+        )
+        .order_by()
+    )
+    rollups = [ActivityRollup(**row) for row in rows.iterator()]
+    days = {rollup.day for rollup in rollups}
+    with transaction.atomic():
+        ActivityRollup.objects.filter(day__in=days).delete()
+        ActivityRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def purge(retention_days):
+    """Удаляет исходные события дней, старше срока хранения."""
+    border = timezone.localdate() - datetime.timedelta(days=retention_days)
+    deleted, _ = ActivityEvent.objects.filter(day__lt=border).delete()
+    return deleted
+
+
+def get_trending(kind, days, limit):
+    """Объекты с наибольшим приростом за последние days дней."""
+    since = timezone.localdate() - datetime.timedelta(days=days)
+    return list(
+        ActivityRollup.objects
+        .filter(kind=kind, day__gte=since)
+        .values('target_id')
+        .annotate(added=Sum('added'), removed=Sum('removed'))
+        .order_by('-added', 'target_id')[:limit]
+    )
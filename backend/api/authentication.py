@@ -0,0 +1,100 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+class TokenUserCache:
+    """LRU с TTL для соответствий token → user внутри процесса."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            user, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._data[key] = (user, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = TokenUserCache(
+    settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL
+)
+
+
+def get_shared_cache():
+    if settings.TOKEN_CACHE_ALIAS:
+        return caches[settings.TOKEN_CACHE_ALIAS]
+    return None
+
+
+def shared_cache_key(key):
+    return f'auth-token:{key}'
+
+
+def invalidate_token(key):
+    token_cache.delete(key)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(shared_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication, не обращающийся к БД для известных токенов.
+
+    С общим кешем токены хранятся только в нём: invalidate_token удаляет
+    ключ сразу для всех процессов. LRU внутри процесса используется, лишь
+    когда общего кеша нет, и тогда другие процессы узнают об отзыве
+    токена не позже чем через TOKEN_CACHE_TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            user = shared_cache.get(shared_cache_key(key))
+            if user is None:
+                user, token = super().authenticate_credentials(key)
+                shared_cache.set(
+                    shared_cache_key(key), user, settings.TOKEN_CACHE_TTL
+                )
+        else:
+            user = token_cache.get(key)
+            if user is None:
+                user, token = super().authenticate_credentials(key)
+                token_cache.set(key, user)
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        # Каждый запрос получает свою копию, чтобы не делить объект
+        # пользователя между потоками.
+        return copy.copy(user), key
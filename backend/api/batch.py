@@ -0,0 +1,58 @@
+"""
+Пакетное чтение рецептов и пользователей для одного экрана клиента.
+
+Как в DataLoader, id со всех частей запроса сначала собираются, а потом
+каждая связь загружается одним запросом с IN: похожие рецепты, документы
+рецептов, избранное и корзина, авторы и подписки на них вместе с
+запрошенными пользователями.
+"""
+from api.documents import get_documents
+from api.representations import (
+    get_author_ids, get_viewer_sets, overlay_viewer_fields, represent_users
+)
+from recipes.models import SimilarRecipe
+
+
+def load_similar(recipe_ids, limit):
+    """До limit похожих рецептов для каждого из recipe_ids."""
+    similar = {recipe_id: [] for recipe_id in recipe_ids}
+    if not limit or not recipe_ids:
+        return similar
+    rows = SimilarRecipe.objects.filter(
+        recipe_id__in=recipe_ids, similar__deleted__isnull=True
+    ).order_by('recipe_id', '-score').values_list('recipe_id', 'similar_id')
+    for recipe_id, similar_id in rows:
+        if len(similar[recipe_id]) < limit:
+            similar[recipe_id].append(similar_id)
+    return similar
+
+
+def resolve_batch(request, recipe_ids, user_ids, similar, recipe_fields,
+                  user_fields):
+    similar_ids = load_similar(recipe_ids, similar)
+    all_recipe_ids = list(dict.fromkeys(
+        recipe_ids + [pk for ids in similar_ids.values() for pk in ids]
+    ))
+    documents = get_documents(all_recipe_ids)
+    # Флаги подписки нужны и авторам рецептов, и запрошенным
+    # пользователям: одна выборка на всех.
+    viewer_fields = recipe_fields
+    if 'is_subscribed' in user_fields:
+        viewer_fields += ('author', )
+    viewer_sets = get_viewer_sets(
+        request, [document['id'] for document in documents],
+        get_author_ids(documents) | set(user_ids), viewer_fields
+    )
+    result = {
+        'recipes': overlay_viewer_fields(
+            documents, request, recipe_fields, viewer_sets
+        ),
+        'users': represent_users(user_ids, viewer_sets[2], user_fields),
+    }
+    if similar:
+        found = {document['id'] for document in documents}
+        result['similar'] = {
+            str(recipe_id): ids for recipe_id, ids in similar_ids.items()
+            if recipe_id in found
+        }
+    return result
@@ -0,0 +1,34 @@
+from django.conf import settings
+
+from caching.shared import bump_version, get_or_compute, get_versions
+from recipes.models import Tag
+
+TAG_CATALOG_VERSION_KEY = 'catalog:tags:version'
+
+
+def load_tag_catalog():
+    return {
+        slug: {'id': pk, 'name': name, 'bit': bit}
+        for pk, slug, name, bit in Tag.objects.values_list(
+            'id', 'slug', 'name', 'bit'
+        )
+    }
+
+
+def get_tag_catalog():
+    """Справочник тегов: slug → {id, name, bit}."""
+    version, = get_versions([TAG_CATALOG_VERSION_KEY])
+    return get_or_compute(
+        f'catalog:tags:{version}', load_tag_catalog,
+        settings.TAG_CATALOG_TTL
+    )
+
+
+def invalidate_tag_catalog():
+    bump_version(TAG_CATALOG_VERSION_KEY)
+
+
+def get_tag_choices():
+    return [
+        (slug, tag['name']) for slug, tag in get_tag_catalog().items()
+    ]
@@ -0,0 +1,57 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+
+def available_encodings():
+    if brotli is not None:
+        return ('br', 'gzip')
+    return ('gzip', )
+
+
+def parse_accept_encoding(header):
+    """Возвращает кодировки из Accept-Encoding с их q."""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """
+    Первая из доступных кодировок, которую принимает клиент. Явно
+    названная кодировка с q=0 исключена, даже если есть *.
+    """
+    accepted = parse_accept_encoding(header)
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, static=False):
+    if encoding == 'br':
+        quality = STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY
+        return brotli.compress(data, quality=quality)
+    level = STATIC_GZIP_LEVEL if static else GZIP_LEVEL
+    return gzip.compress(data, compresslevel=level, mtime=0)
@@ -0,0 +1,66 @@
+"""
+Условные запросы к рецепту: ETag, If-None-Match и If-Match.
+
+ETag рецепта имеет вид "<id>-<version>-<хеш тела>". Хеш тела нужен для
+If-None-Match: ответ зависит и от пользователя (is_favorited и т. п.), и
+от связанных объектов, которые не меняют версию рецепта. If-Match
+сравнивает только id и версию. CompressionMiddleware ослабляет ETag
+сжатых ответов, поэтому слабые метки W/ принимаются в обоих заголовках.
+"""
+import hashlib
+import json
+import re
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+RECIPE_ETAG = re.compile(r'^(?:W/)?"(\d+)-(\d+)-[0-9a-f]+"$')
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'Рецепт изменён с момента загрузки.'
+    default_code = 'precondition_failed'
+
+
+def recipe_etag(recipe_id, version, data):
+    digest = hashlib.md5(
+        json.dumps(data, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()[:16]
+    return f'"{recipe_id}-{version}-{digest}"'
+
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def none_match(request, etag):
+    """True, если у клиента уже есть ответ с меткой etag."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or strip_weak(etag) in map(strip_weak, etags)
+
+
+def check_if_match(request, recipe):
+    """
+    Проверяет If-Match по версии рецепта, загруженного для изменения.
+
+    Без заголовка изменение всё равно условное: запрос UPDATE сверяет
+    версию, прочитанную в начале запроса.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header:
+        return
+    etags = parse_etags(header)
+    if '*' in etags:
+        return
+    for etag in etags:
+        match = RECIPE_ETAG.match(etag)
+        if match and tuple(map(int, match.groups())) == (
+            recipe.pk, recipe.version
+        ):
+            return
+    raise PreconditionFailed
@@ -0,0 +1,98 @@
+"""
+Кеш числа рецептов для постраничной выдачи списка.
+
+Ключ строится из нормализованных параметров фильтрации; для личных
+фильтров (избранное, корзина) в него входит пользователь. Вместо удаления
+ключей при записи повышается версия: общая — при создании и удалении
+рецептов и смене тегов, пользовательская — при изменении его избранного и
+корзины. С локальным кешем другие процессы увидят изменения не позже
+чем через RECIPE_COUNT_CACHE_TTL; с общим — сразу, а промах после смены
+версии считает один процесс.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import connections
+
+from caching.shared import (
+    bump_version, get_cache as get_shared_cache, get_or_compute,
+    get_versions
+)
+
+COUNT_FILTERS = (
+    'tags', 'tags_match', 'author', 'is_favorited', 'is_in_shopping_cart',
+)
+PERSONAL_FILTERS = ('is_favorited', 'is_in_shopping_cart')
+RECIPES_VERSION_KEY = 'counts:recipes:version'
+
+
+def get_cache():
+    return get_shared_cache(settings.RECIPE_COUNT_CACHE_ALIAS)
+
+
+def user_version_key(user_id):
+    return f'counts:user:{user_id}:version'
+
+
+def invalidate_recipe_counts():
+    bump_version(RECIPES_VERSION_KEY, get_cache())
+
+
+def invalidate_user_counts(user_id):
+    bump_version(user_version_key(user_id), get_cache())
+
+
+def recipe_count_key(request):
+    params = []
+    personal = False
+    for name in COUNT_FILTERS:
+        values = sorted({
+            value.lower() for value in request.query_params.getlist(name)
+            if value
+        })
+        if values:
+            params.append(f'{name}={",".join(values)}')
+            personal |= name in PERSONAL_FILTERS
+    version_keys = [RECIPES_VERSION_KEY]
+    user = request.user
+    if personal and user.is_authenticated:
+        version_keys.append(user_version_key(user.id))
+        # Версии разных пользователей могут совпадать.
+        params.append(f'user={user.id}')
+    parts = map(str, get_versions(version_keys, get_cache()))
+    digest = hashlib.md5('&'.join(params).encode()).hexdigest()
+    return f'counts:recipes:{".".join(parts)}:{digest}'
+
+
+def estimate_count(queryset):
+    """Оценка числа строк планировщиком PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_queryset(queryset):
+    """
+    Число строк и признак точности.
+
+    COUNT(*) ограничен RECIPE_EXACT_COUNT_LIMIT строками; если их больше,
+    вместо точного значения берётся оценка планировщика, но не меньше
+    порога.
+    """
+    limit = settings.RECIPE_EXACT_COUNT_LIMIT
+    count = queryset[:limit + 1].count()
+    if count <= limit:
+        return count, True
+    return max(estimate_count(queryset) or 0, count), False
+
+
+def get_recipe_count(queryset, key):
+    return get_or_compute(
+        key, lambda: count_queryset(queryset),
+        settings.RECIPE_COUNT_CACHE_TTL, get_cache()
+    )
@@ -0,0 +1,154 @@
+"""
+Мягкое удаление рецептов и пользователей и отложенная очистка.
+
+Запрос на удаление только ставит отметку deleted: менеджеры objects
+скрывают отмеченные строки, и ответ не ждёт каскада по избранному,
+корзинам и подпискам. Связанные строки удаляет фоновая задача пачками по
+PURGE_BATCH_SIZE, каждая в своей короткой транзакции, а файлы
+изображений освобождает сигнал post_delete рецепта.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.counts import invalidate_recipe_counts
+from api.documents import invalidate_documents
+from jobs.models import Job
+from jobs.queue import enqueue
+from recipes.models import (
+    Favorite, IngredientsInRecipe, Recipe, RecipeDocument, ShoppingCart,
+    SimilarRecipe
+)
+from users.models import Subscription
+
+CustomUser = get_user_model()
+
+
+def soft_delete_recipe(recipe, **conditions):
+    """
+    Отмечает рецепт удалённым; conditions сужают UPDATE, например
+    version=n. Возвращает False, если строка не подошла под условия.
+    """
+    updated = Recipe.objects.filter(pk=recipe.pk, **conditions).update(
+        deleted=timezone.now(), version=F('version') + 1
+    )
+    if not updated:
+        return False
+    invalidate_documents([recipe.pk])
+    invalidate_recipe_counts()
+    transaction.on_commit(lambda: enqueue(
+        'recipes.purge_recipe', {'recipe_id': recipe.pk},
+        delay=settings.PURGE_DELAY,
+    ))
+    return True
+
+
+def restore_recipes(recipe_ids):
+    """
+    Снимает отметку об удалении, пока рецепты не очищены; задача
+    purge_recipe пропускает восстановленные рецепты.
+    """
+    restored = Recipe.all_objects.filter(
+        pk__in=recipe_ids, deleted__isnull=False
+    ).update(deleted=None, version=F('version') + 1)
+    if restored:
+        invalidate_documents(recipe_ids)
+        invalidate_recipe_counts()
+    return restored
+
+
+@transaction.atomic
+def soft_delete_user(user):
+    """
+    Отмечает пользователя и его рецепты удалёнными и разлогинивает его.
+
+    Email и username освобождаются сразу, чтобы их можно было занять
+    снова до окончания очистки.
+    """
+    now = timezone.now()
+    CustomUser.objects.filter(pk=user.pk).update(
+        deleted=now, is_active=False,
+        email=f'deleted-{user.pk}@deleted.invalid',
+        username=f'deleted-{user.pk}',
+    )
+    Recipe.objects.filter(author_id=user.pk).update(
+        deleted=now, version=F('version') + 1
+    )
+    Token.objects.filter(user_id=user.pk).delete()
+    invalidate_recipe_counts()
+    transaction.on_commit(lambda: enqueue(
+        'users.purge_user', {'user_id': user.pk}, delay=settings.PURGE_DELAY,
+    ))
+
+
+def delete_in_chunks(queryset, batch_size=None):
+    """Удаляет строки queryset пачками, каждую в отдельной транзакции."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    model = queryset.model
+    total = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return total
+        with transaction.atomic():
+            total += model._base_manager.filter(pk__in=pks).delete()[0]
+
+
+def purge_recipes(recipe_ids):
+    """Физически удаляет рецепты и всё, что на них ссылается."""
+    counts = {
+        'favorites': delete_in_chunks(
+            Favorite.objects.filter(recipe_id__in=recipe_ids)
+        ),
+        'shopping_carts': delete_in_chunks(
+            ShoppingCart.objects.filter(recipe_id__in=recipe_ids)
+        ),
+        'recipe_ingredients': delete_in_chunks(
+            IngredientsInRecipe.objects.filter(recipe_id__in=recipe_ids)
+        ),
+        'recipe_tags': delete_in_chunks(
+            Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        ),
+        'similar': delete_in_chunks(SimilarRecipe.objects.filter(
+            Q(recipe_id__in=recipe_ids) | Q(similar_id__in=recipe_ids)
+        )),
+    }
+    with transaction.atomic():
+        RecipeDocument.objects.filter(recipe_id__in=recipe_ids).delete()
+        # post_delete рецепта ставит освобождение файла изображения.
+        counts['recipes'] = Recipe.all_objects.filter(
+            pk__in=recipe_ids
+        ).delete()[1].get(Recipe._meta.label, 0)
+    return counts
+
+
+def purge_user(user_id):
+    batch_size = settings.PURGE_BATCH_SIZE
+    recipes = Recipe.all_objects.filter(author_id=user_id).order_by('pk')
+    total = 0
+    while True:
+        recipe_ids = list(recipes.values_list('pk', flat=True)[:batch_size])
+        if not recipe_ids:
+            break
+        total += purge_recipes(recipe_ids)['recipes']
+    counts = {
+        'recipes': total,
+        'favorites': delete_in_chunks(
+            Favorite.objects.filter(user_id=user_id)
+        ),
+        'shopping_carts': delete_in_chunks(
+            ShoppingCart.objects.filter(user_id=user_id)
+        ),
+        'subscriptions': delete_in_chunks(Subscription.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        )),
+        'jobs': delete_in_chunks(Job.objects.filter(user_id=user_id)),
+    }
+    # Общий счётчик delete() включает и каскад, например журнал админки.
+    counts['users'] = CustomUser.all_objects.filter(
+        pk=user_id, deleted__isnull=False
+    ).delete()[1].get(CustomUser._meta.label, 0)
+    return counts
@@ -0,0 +1,44 @@
+from django.db import transaction
+
+from api.representations import RECIPE_VALUES, build_documents
+from recipes.models import Recipe, RecipeDocument
+
+
+def rebuild_documents(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    documents = build_documents(
+        Recipe.objects.filter(id__in=recipe_ids).values(*RECIPE_VALUES)
+    )
+    with transaction.atomic():
+        RecipeDocument.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeDocument.objects.bulk_create(
+            (
+                RecipeDocument(recipe_id=document['id'], document=document)
+                for document in documents
+            ),
+            ignore_conflicts=True
+        )
+    return {document['id']: document for document in documents}
+
+
+def invalidate_documents(recipe_ids):
+    RecipeDocument.objects.filter(recipe_id__in=recipe_ids).delete()
+
+
+def get_documents(recipe_ids):
+    """
+    Материализованные документы рецептов в порядке recipe_ids.
+
+    Недостающие документы строятся и сохраняются на месте. Документы
+    удалённых рецептов пропускаются до их очистки.
+    """
+    recipe_ids = list(recipe_ids)
+    documents = dict(
+        RecipeDocument.objects.filter(
+            recipe_id__in=recipe_ids, recipe__deleted__isnull=True
+        ).values_list('recipe_id', 'document')
+    )
+    missing = [pk for pk in recipe_ids if pk not in documents]
+    if missing:
+        documents.update(rebuild_documents(missing))
+    return [documents[pk] for pk in recipe_ids if pk in documents]
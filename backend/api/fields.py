@@ -0,0 +1,32 @@
+import filetype
+from django.conf import settings
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import FileField
+
+
+class DeferredBase64ImageField(Base64FieldMixin, FileField):
+    """
+    Base64-изображение, тип которого определяется по сигнатуре файла.
+
+    В отличие от Base64ImageField не декодирует изображение через Pillow
+    во время запроса: полная проверка и нормализация выполняются фоновой
+    задачей recipes.process_image.
+    """
+
+    ALLOWED_TYPES = Base64ImageField.ALLOWED_TYPES
+    INVALID_FILE_MESSAGE = Base64ImageField.INVALID_FILE_MESSAGE
+    INVALID_TYPE_MESSAGE = Base64ImageField.INVALID_TYPE_MESSAGE
+
+    def to_internal_value(self, base64_data):
+        max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        if isinstance(base64_data, str) and (
+            len(base64_data) * 3 // 4 > max_bytes
+        ):
+            raise ValidationError(
+                f'Размер изображения больше {max_bytes // 1024 // 1024} МБ'
+            )
+        return super().to_internal_value(base64_data)
+
+    def get_file_extension(self, filename, decoded_file):
+        return filetype.guess_extension(decoded_file)
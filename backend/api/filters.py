@@ -1,10 +1,24 @@
+from django.conf import settings
+from django.db.models import Case, F, When
 from django_filters.rest_framework import FilterSet, filters
 
+from api.catalogs import get_tag_catalog, get_tag_choices
 from recipes.models import Ingredient, Recipe
+from recipes.search import search_ingredients
+
+TAGS_MATCH_CHOICES = (
+    ('any', 'Любой из тегов'),
+    ('all', 'Все теги'),
+)
 
 
 class RecipesFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices, method='get_tags'
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=TAGS_MATCH_CHOICES, method='get_tags_match'
+    )
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
@@ -19,6 +33,33 @@ class RecipesFilter(FilterSet):
             'is_in_shopping_cart',
         )
 
+    def get_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        match_all = self.form.cleaned_data.get('tags_match') == 'all'
+        catalog = get_tag_catalog()
+        # Тег без бита или ещё не попавший в каталог ищется по связям.
+        if any(catalog.get(slug, {}).get('bit') is None for slug in value):
+            return self.get_tags_by_join(queryset, value, match_all)
+        bits = [catalog[slug]['bit'] for slug in value]
+        mask = 0
+        for bit in bits:
+            mask |= 1 << bit
+        queryset = queryset.annotate(tag_bits=F('tags_mask').bitand(mask))
+        if match_all:
+            return queryset.filter(tag_bits=mask)
+        return queryset.filter(tag_bits__gt=0)
+
+    def get_tags_by_join(self, queryset, slugs, match_all):
+        if match_all:
+            for slug in slugs:
+                queryset = queryset.filter(tags__slug=slug)
+            return queryset
+        return queryset.filter(tags__slug__in=slugs).distinct()
+
+    def get_tags_match(self, queryset, name, value):
+        return queryset
+
     def get_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -33,8 +74,30 @@ class RecipesFilter(FilterSet):
 
 
 class IngredientsFilter(FilterSet):
-    name = filters.CharFilter(lookup_expr='startswith')
+    """
+    Поиск по имени без учёта регистра и с опечатками: не больше limit
+    ингредиентов, от лучшего совпадения к худшему.
+    """
+
+    name = filters.CharFilter(method='search_name')
+    limit = filters.NumberFilter(method='get_limit')
 
     class Meta:
         model = Ingredient
         fields = ('name', )
+
+    def search_name(self, queryset, name, value):
+        limit = self.form.cleaned_data.get('limit')
+        limit = min(
+            int(limit or settings.INGREDIENT_SEARCH_LIMIT),
+            settings.INGREDIENT_SEARCH_MAX_LIMIT,
+        )
+        ids = search_ingredients(value, max(limit, 1))
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=ids).order_by(Case(*(
+            When(pk=pk, then=position) for position, pk in enumerate(ids)
+        )))
+
+    def get_limit(self, queryset, name, value):
+        return queryset
@@ -0,0 +1,75 @@
+"""
+Проверки готовности реплики: доступность БД и кеша.
+
+Балансировщик выводит реплику из ротации, пока /api/health/ отвечает
+503, поэтому проверки короткие и не трогают таблицы приложения.
+Подробности проверок видят только сотрудники, остальным отдаётся
+лишь статус; причины отказов пишутся в журнал.
+"""
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from caching.shared import get_cache
+
+logger = logging.getLogger(__name__)
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def check_database(alias='default'):
+    connection = connections[alias]
+    status = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+    }
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            status['latency_ms'] = elapsed_ms(started)
+            if connection.vendor == 'postgresql':
+                # Сколько соединений уже занято всеми репликами и воркерами.
+                cursor.execute(
+                    'SELECT count(*), current_setting(%s)::int '
+                    'FROM pg_stat_activity WHERE datname = current_database()',
+                    ['max_connections']
+                )
+                status['connections'], status['max_connections'] = (
+                    cursor.fetchone()
+                )
+    except DatabaseError as error:
+        logger.warning('Проверка БД %s не прошла: %s', alias, error)
+        return {**status, 'ok': False, 'error': str(error)}
+    return {**status, 'ok': True}
+
+
+def check_cache():
+    cache = get_cache()
+    status = {
+        'backend': settings.CACHES[settings.SHARED_CACHE_ALIAS]['BACKEND'],
+        'shared': settings.SHARED_CACHE,
+    }
+    key = f'health:{uuid.uuid4().hex}'
+    started = time.perf_counter()
+    try:
+        cache.set(key, 1, 10)
+        ok = cache.get(key) == 1
+        cache.delete(key)
+    except Exception as error:
+        # Клиенты memcached и redis бросают собственные исключения.
+        logger.warning('Проверка кеша не прошла: %s', error)
+        return {**status, 'ok': False, 'error': str(error)}
+    return {**status, 'ok': ok, 'latency_ms': elapsed_ms(started)}
+
+
+def check_health():
+    checks = {'database': check_database(), 'cache': check_cache()}
+    ok = all(check['ok'] for check in checks.values())
+    return ok, {'status': 'ok' if ok else 'error', **checks}
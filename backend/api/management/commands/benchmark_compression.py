@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.test import Client
+
+from api.compression import available_encodings
+
+DEFAULT_ENDPOINTS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=50',
+    '/api/tags/',
+    '/api/ingredients/',
+    '/api/users/',
+)
+
+
+class Command(BaseCommand):
+    help = "compare response bytes and latency per endpoint and encoding"
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoints', nargs='*')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if '*' not in host),
+            'localhost'
+        )
+        client = Client(HTTP_HOST=host.lstrip('.'))
+        encodings = ('identity', ) + available_encodings()
+        self.stdout.write(
+            f'{"endpoint":<32}{"encoding":<10}{"bytes":>10}'
+            f'{"ratio":>8}{"p50, ms":>10}{"p95, ms":>10}'
+        )
+        for endpoint in options['endpoints'] or DEFAULT_ENDPOINTS:
+            raw_size = None
+            for encoding in encodings:
+                size, timings = self.measure(
+                    client, endpoint, encoding, options['repeat']
+                )
+                raw_size = raw_size or size
+                self.stdout.write(
+                    f'{endpoint:<32}{encoding:<10}{size:>10}'
+                    f'{size / raw_size:>8.2f}'
+                    f'{statistics.median(timings):>10.1f}'
+                    f'{self.percentile(timings, 95):>10.1f}'
+                )
+
+    def measure(self, client, endpoint, encoding, repeat):
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(endpoint, HTTP_ACCEPT_ENCODING=encoding)
+            timings.append((time.perf_counter() - start) * 1000)
+            size = len(response.content)
+        return size, timings
+
+    def percentile(self, values, percent):
+        values = sorted(values)
+        index = min(len(values) - 1, int(len(values) * percent / 100))
+        return values[index]
@@ -0,0 +1,44 @@
+import re
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from api.documents import invalidate_documents
+from recipes.models import Recipe
+
+HASHED_NAME = re.compile(r'^images/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+class Command(BaseCommand):
+    help = "move recipe images to content-addressed names"
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        names = (
+            Recipe.all_objects.exclude(image='').order_by('image')
+            .values_list('image', flat=True).distinct()
+        )
+        moved = missing = 0
+        for name in names:
+            if HASHED_NAME.match(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name, 'rb') as file:
+                saved = storage.save(name, file)
+            with transaction.atomic():
+                recipe_ids = list(Recipe.all_objects.filter(
+                    image=name
+                ).values_list('id', flat=True))
+                Recipe.all_objects.filter(pk__in=recipe_ids).update(
+                    image=saved
+                )
+                invalidate_documents(recipe_ids)
+            # Старые имена больше не выдаются, новых ссылок на файл не будет.
+            storage.delete(name)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Изображений перенесено: {moved}, не найдено файлов: {missing}'
+        ))
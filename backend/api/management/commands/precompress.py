@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from api.compression import available_encodings, compress
+
+EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+class Command(BaseCommand):
+    help = "precompress static files, media and docs into .gz/.br"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Каталоги для обработки. По умолчанию STATIC_ROOT, '
+                 'MEDIA_ROOT и DOCS_ROOT.'
+        )
+        parser.add_argument(
+            '--min-size', type=int, default=settings.COMPRESSION_MIN_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or (
+            settings.STATIC_ROOT, settings.MEDIA_ROOT, settings.DOCS_ROOT
+        )
+        created = 0
+        for root in map(Path, paths):
+            if not root.is_dir():
+                self.stdout.write(f'Пропущен {root}: каталога нет')
+                continue
+            for path in self.iter_files(root):
+                created += self.compress_file(path, options['min_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Создано сжатых файлов: {created}')
+        )
+
+    def iter_files(self, root):
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                if path.suffix in settings.PRECOMPRESS_EXTENSIONS:
+                    yield path
+
+    def compress_file(self, path, min_size):
+        stat = path.stat()
+        if stat.st_size < min_size:
+            return 0
+        data = None
+        created = 0
+        for encoding in available_encodings():
+            target = path.with_name(path.name + EXTENSIONS[encoding])
+            if target.exists() and target.stat().st_mtime >= stat.st_mtime:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            compressed = compress(data, encoding, static=True)
+            if len(compressed) >= len(data):
+                continue
+            target.write_bytes(compressed)
+            os.utime(target, (stat.st_atime, stat.st_mtime))
+            created += 1
+        return created
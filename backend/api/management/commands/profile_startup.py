@@ -0,0 +1,73 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = "report import time of a manage.py command (-X importtime)"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'arguments', nargs='*', default=['check'],
+            help='Команда manage.py с аргументами, по умолчанию check.',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        env = os.environ.copy()
+        # Значение по умолчанию из manage.py не передаём: дочерний процесс
+        # сам выберет профиль настроек для своей команды.
+        if env.get('DJANGO_SETTINGS_MODULE') == 'backend.settings':
+            del env['DJANGO_SETTINGS_MODULE']
+        command = [
+            sys.executable, '-X', 'importtime',
+            str(settings.BASE_DIR / 'manage.py'), *options['arguments'],
+        ]
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            process = subprocess.run(
+                command, env=env, stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE, text=True,
+            )
+            timings.append(time.perf_counter() - started)
+        packages, total = self.parse(process.stderr)
+        self.stdout.write(
+            f'wall time, ms: min {min(timings) * 1000:.0f}, '
+            f'max {max(timings) * 1000:.0f}; imports, ms: {total / 1000:.0f}'
+        )
+        self.stdout.write(f'{"package":<32}{"self, ms":>10}{"share":>8}')
+        for package, self_time in sorted(
+            packages.items(), key=lambda item: -item[1]
+        )[:options['top']]:
+            self.stdout.write(
+                f'{package:<32}{self_time / 1000:>10.1f}'
+                f'{self_time / total:>8.1%}'
+            )
+        if process.returncode:
+            self.stderr.write(
+                f'Команда завершилась с кодом {process.returncode}'
+            )
+
+    def parse(self, output):
+        """Собственное время импорта по пакетам верхнего уровня, мкс."""
+        packages = defaultdict(int)
+        total = 0
+        for line in output.splitlines():
+            match = IMPORT_TIME.match(line)
+            if match is None:
+                continue
+            self_time, _, _, module = match.groups()
+            packages[module.split('.')[0]] += int(self_time)
+            total += int(self_time)
+        return packages, total or 1
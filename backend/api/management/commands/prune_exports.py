@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from api.shopping_list import prune_exports
+
+
+class Command(BaseCommand):
+    help = "delete old shopping list export files"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.EXPORT_FILE_TTL,
+            help='Удалять файлы старше стольких секунд.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_exports(options['older_than'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов списков покупок: {deleted}'
+        ))
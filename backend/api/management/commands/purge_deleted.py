@@ -0,0 +1,45 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from api.deletion import purge_recipes, purge_user
+from recipes.models import Recipe
+
+CustomUser = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "purge soft-deleted recipes and users"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.PURGE_DELAY,
+            help='Очищать только удалённые раньше, чем столько секунд назад.',
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(
+            seconds=options['older_than']
+        )
+        users = 0
+        for user_id in CustomUser.all_objects.filter(
+            deleted__lte=before
+        ).values_list('id', flat=True):
+            purge_user(user_id)
+            users += 1
+        recipes = Recipe.all_objects.filter(
+            deleted__lte=before
+        ).order_by('pk').values_list('pk', flat=True)
+        total = 0
+        while True:
+            recipe_ids = list(recipes[:settings.PURGE_BATCH_SIZE])
+            if not recipe_ids:
+                break
+            total += purge_recipes(recipe_ids)['recipes']
+        self.stdout.write(self.style.SUCCESS(
+            f'Очищено пользователей: {users}, рецептов: {total}'
+        ))
@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from api.documents import rebuild_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "rebuild materialized recipe documents"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch = []
+        total = 0
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        ).iterator(chunk_size=options['batch_size'])
+        for recipe_id in recipe_ids:
+            batch.append(recipe_id)
+            if len(batch) >= options['batch_size']:
+                total += len(rebuild_documents(batch))
+                batch = []
+        if batch:
+            total += len(rebuild_documents(batch))
+        self.stdout.write(
+            self.style.SUCCESS(f'Документы пересобраны: {total}')
+        )
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from api.compression import choose_encoding, compress
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжимает ответы API в br или gzip в зависимости от Accept-Encoding.
+
+    Сжимаются только типы из COMPRESSION_CONTENT_TYPES размером не меньше
+    COMPRESSION_MIN_SIZE байт.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        compressed_content = compress(response.content, encoding)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class LoadSheddingMiddleware:
+    """
+    Отклоняет пишущие запросы с 503, пока воркеры не справляются.
+
+    Время ожидания в очереди считается по заголовку X-Request-Start,
+    который выставляет nginx, и сглаживается экспоненциальным средним.
+    Пока среднее выше LOAD_SHEDDING_QUEUE_LATENCY, запросы с небезопасными
+    методами получают 503 с Retry-After, а чтение продолжает работать.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.latency = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        queue_latency = self.get_queue_latency(request)
+        if queue_latency is not None:
+            with self.lock:
+                alpha = settings.LOAD_SHEDDING_EWMA_ALPHA
+                self.latency += alpha * (queue_latency - self.latency)
+            if (request.method not in self.SAFE_METHODS
+                    and self.latency > settings.LOAD_SHEDDING_QUEUE_LATENCY):
+                response = JsonResponse(
+                    {'detail': 'Сервер перегружен, повторите запрос позже.'},
+                    status=503,
+                )
+                response['Retry-After'] = settings.LOAD_SHEDDING_RETRY_AFTER
+                return response
+        return self.get_response(request)
+
+    def get_queue_latency(self, request):
+        header = request.META.get('HTTP_X_REQUEST_START', '')
+        if not header:
+            return None
+        try:
+            started = float(header.lstrip('t='))
+        except ValueError:
+            return None
+        return max(0.0, time.time() - started)
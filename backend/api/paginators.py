@@ -1,7 +1,63 @@
 from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from api.counts import get_recipe_count
+
+
+class CachedCountPaginator(Paginator):
+    """Берёт число объектов из кеша api.counts по ключу count_key."""
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = get_recipe_count(
+            self.object_list, self.count_key
+        )
+        return count
 
 
 class RecipesLimitPaginator(PageNumberPagination):
+    """
+    Если представление определяет get_count_cache_key, число объектов
+    берётся из кеша и может быть приблизительным; ответ сообщает об этом
+    полем count_exact.
+    """
+
     page_size = settings.RECIPESR_ON_PAGE
     page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        get_key = getattr(view, 'get_count_cache_key', None)
+        self.count_key = get_key() if get_key is not None else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        if self.count_key is None:
+            return Paginator(object_list, per_page)
+        return CachedCountPaginator(object_list, per_page, self.count_key)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_exact': getattr(
+                self.page.paginator, 'count_exact', True
+            ),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {
+            'type': 'boolean',
+            'example': True,
+        }
+        return response_schema
@@ -0,0 +1,208 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import IngredientsInRecipe, Recipe
+
+CustomUser = get_user_model()
+
+RECIPE_FIELDS = (
+    'id', 'tags', 'author', 'ingredients', 'is_favorited',
+    'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+)
+RECIPE_VALUES = (
+    'id', 'author_id', 'name', 'image', 'text', 'cooking_time', 'version'
+)
+AUTHOR_VALUES = ('id', 'username', 'email', 'first_name', 'last_name')
+USER_FIELDS = AUTHOR_VALUES + ('is_subscribed', )
+
+
+def get_requested_fields(request, allowed=RECIPE_FIELDS, param='fields'):
+    """Разбирает параметр ?fields=id,name,image."""
+    value = request.query_params.get(param) if request else None
+    if not value:
+        return allowed
+    requested = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(requested) - set(allowed)
+    if unknown:
+        raise ValidationError(
+            {param: f'Неизвестные поля: {", ".join(sorted(unknown))}'}
+        )
+    return tuple(name for name in allowed if name in requested)
+
+
+def get_image_url(name):
+    if not name:
+        return None
+    return Recipe._meta.get_field('image').storage.url(name)
+
+
+def get_viewer_sets(request, recipe_ids=(), author_ids=(), fields=()):
+    """Id избранных рецептов, рецептов в корзине и авторов в подписках."""
+    favorited, in_cart, subscribed = set(), set(), set()
+    user = request.user if request else None
+    if not (user and user.is_authenticated):
+        return favorited, in_cart, subscribed
+    if recipe_ids and 'is_favorited' in fields:
+        favorited = set(user.favorites.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+    if recipe_ids and 'is_in_shopping_cart' in fields:
+        in_cart = set(user.shopping_cart.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+    if author_ids and 'author' in fields:
+        subscribed = set(user.subscriptions_user.filter(
+            author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+    return favorited, in_cart, subscribed
+
+
+def load_tags(recipe_ids):
+    tags = defaultdict(list)
+    rows = (
+        Recipe.tags.through.objects
+        .filter(recipe_id__in=recipe_ids)
+        .order_by('tag__name')
+        .values_list(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+        )
+    )
+    for recipe_id, tag_id, name, color, slug in rows:
+        tags[recipe_id].append(
+            {'id': tag_id, 'name': name, 'color': color, 'slug': slug}
+        )
+    return tags
+
+
+def load_ingredients(recipe_ids):
+    ingredients = defaultdict(list)
+    rows = (
+        IngredientsInRecipe.objects
+        .filter(recipe_id__in=recipe_ids)
+        .order_by('pk')
+        .values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        )
+    )
+    for recipe_id, ingredient_id, name, unit, amount in rows:
+        ingredients[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'measurement_unit': unit,
+            'amount': amount,
+        })
+    return ingredients
+
+
+def load_authors(author_ids):
+    return {
+        author['id']: author
+        for author in CustomUser.objects.filter(
+            id__in=author_ids
+        ).values(*AUTHOR_VALUES)
+    }
+
+
+def build_documents(rows, fields=RECIPE_FIELDS):
+    """
+    Собирает не зависящую от пользователя часть представления рецептов
+    из строк .values(*RECIPE_VALUES).
+
+    Повторяет вывод RecipeReadSerializer, но без диспетчеризации по полям
+    сериализатора: связанные объекты подгружаются одним запросом на
+    каждую связь.
+    """
+    rows = list(rows)
+    recipe_ids = [row['id'] for row in rows]
+    tags = load_tags(recipe_ids) if 'tags' in fields else {}
+    ingredients = (
+        load_ingredients(recipe_ids) if 'ingredients' in fields else {}
+    )
+    authors = (
+        load_authors({row['author_id'] for row in rows})
+        if 'author' in fields else {}
+    )
+    documents = []
+    for row in rows:
+        recipe_id = row['id']
+        document = {
+            'id': recipe_id,
+            'name': row['name'],
+            'image': get_image_url(row['image']),
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+            # Не входит в RECIPE_FIELDS: нужна только для ETag.
+            'version': row['version'],
+        }
+        if 'tags' in fields:
+            document['tags'] = tags.get(recipe_id, [])
+        if 'ingredients' in fields:
+            document['ingredients'] = ingredients.get(recipe_id, [])
+        if 'author' in fields:
+            document['author'] = authors.get(row['author_id'])
+        documents.append(document)
+    return documents
+
+
+def overlay_viewer_fields(documents, request, fields=RECIPE_FIELDS,
+                          viewer_sets=None):
+    """
+    Добавляет к документам флаги текущего пользователя.
+
+    viewer_sets — заранее загруженный результат get_viewer_sets, если
+    флаги нужны не только этим документам.
+    """
+    if viewer_sets is None:
+        viewer_sets = get_viewer_sets(
+            request, [document['id'] for document in documents],
+            get_author_ids(documents), fields
+        )
+    favorited, in_cart, subscribed = viewer_sets
+    result = []
+    for document in documents:
+        recipe_id = document['id']
+        values = dict(
+            document,
+            is_favorited=recipe_id in favorited,
+            is_in_shopping_cart=recipe_id in in_cart,
+        )
+        if request and document.get('image'):
+            values['image'] = request.build_absolute_uri(document['image'])
+        author = document.get('author')
+        if author:
+            values['author'] = dict(
+                author, is_subscribed=author['id'] in subscribed
+            )
+        result.append({name: values.get(name) for name in fields})
+    return result
+
+
+def get_author_ids(documents):
+    return {
+        document['author']['id'] for document in documents
+        if document.get('author')
+    }
+
+
+def represent_users(user_ids, subscribed, fields=USER_FIELDS):
+    """Пользователи в порядке user_ids; несуществующие пропускаются."""
+    users = load_authors(user_ids)
+    return [
+        {
+            name: (
+                user_id in subscribed if name == 'is_subscribed'
+                else users[user_id][name]
+            )
+            for name in fields
+        }
+        for user_id in user_ids if user_id in users
+    ]
+
+
+def represent_recipes(rows, request, fields=RECIPE_FIELDS):
+    return overlay_viewer_fields(
+        build_documents(rows, fields), request, fields
+    )
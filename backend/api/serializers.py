@@ -1,20 +1,49 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework.serializers import (
-    CharField, ModelSerializer, PrimaryKeyRelatedField,
-    ReadOnlyField, SerializerMethodField, ValidationError
+    CharField, ChoiceField, IntegerField, ModelSerializer,
+    PrimaryKeyRelatedField, ReadOnlyField, Serializer, SerializerMethodField,
+    ValidationError
 )
 
+from activity.models import ActivityKind
+from api.conditional import PreconditionFailed
+from api.documents import rebuild_documents
+from api.fields import DeferredBase64ImageField
+from api.shopping_list import EXPORT_FORMATS
+from jobs.models import Job
+from jobs.queue import enqueue
 from recipes.models import (
     Favorite, Ingredient, IngredientsInRecipe,
     Recipe, ShoppingCart, Tag
 )
+from recipes.signals import schedule_image_release
 from users.models import Subscription
 
 CustomUser = get_user_model()
 
 
+def get_is_subscribed(request, author):
+    """
+    Подписан ли текущий пользователь на author.
+
+    Использует аннотацию is_subscribed из queryset, если она есть;
+    на себя подписаться нельзя, поэтому для себя запрос не нужен.
+    """
+    if not (request and request.user.is_authenticated):
+        return False
+    if hasattr(author, 'is_subscribed'):
+        return author.is_subscribed
+    if author.pk == request.user.pk:
+        return False
+    return request.user.subscriptions_user.filter(author=author).exists()
+
+
 class CustomUserReadSerializer(ModelSerializer):
     is_subscribed = SerializerMethodField()
 
@@ -26,11 +55,7 @@ class CustomUserReadSerializer(ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.subscriptions_user.filter(
-                    author=obj
-                ).exists())
+        return get_is_subscribed(self.context.get('request'), obj)
 
 
 class CustomUserCreateSerializer(ModelSerializer):
@@ -63,11 +88,7 @@ class SubscriptionReadSerializer(ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.subscriptions_user.filter(
-                    author=obj
-                ).exists())
+        return get_is_subscribed(self.context.get('request'), obj)
 
     def get_recipes(self, obj):
         request = self.context.get('request')
@@ -83,6 +104,8 @@ class SubscriptionReadSerializer(ModelSerializer):
         return serializer.data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
 
@@ -110,7 +133,7 @@ class IngredientSerializer(ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = '__all__'
+        fields = ('id', 'name', 'measurement_unit')
 
 
 class TagSerializer(ModelSerializer):
@@ -178,7 +201,7 @@ class RecipeCreateUpdateSerializer(ModelSerializer):
     )
     author = CustomUserReadSerializer(read_only=True)
     ingredients = IngredientsInRecipeCreateSerializer(many=True)
-    image = Base64ImageField()
+    image = DeferredBase64ImageField()
 
     class Meta:
         model = Recipe
@@ -194,16 +217,49 @@ class RecipeCreateUpdateSerializer(ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.get_ingredient_list(recipe, ingredients)
         recipe.tags.set(tags)
+        rebuild_documents([recipe.id])
+        enqueue('recipes.process_image', {'recipe_id': recipe.id}, author)
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        recipe = super().update(recipe, validated_data)
-        recipe.tags.clear()
-        recipe.tags.set(tags)
-        recipe.ingredients.clear()
-        self.get_ingredient_list(recipe, ingredients)
+        """
+        Условное обновление: UPDATE ... WHERE version = n вместо
+        блокировки строки. Если рецепт успели изменить после загрузки,
+        запрос завершается с 412.
+        """
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        old_image = recipe.image.name
+        image = validated_data.pop('image', None)
+        if image is not None:
+            recipe.image.save(image.name, image, save=False)
+            validated_data['image'] = recipe.image.name
+        updated = Recipe.objects.filter(
+            pk=recipe.pk, version=recipe.version
+        ).update(
+            version=F('version') + 1, updated=timezone.now(), **validated_data
+        )
+        if not updated:
+            if image is not None:
+                schedule_image_release(recipe.image.name)
+            raise PreconditionFailed
+        recipe.version += 1
+        for name, value in validated_data.items():
+            setattr(recipe, name, value)
+        if tags is not None:
+            recipe.tags.set(tags)
+        if ingredients is not None:
+            recipe.ingredients.clear()
+            self.get_ingredient_list(recipe, ingredients)
+        rebuild_documents([recipe.id])
+        if image is not None:
+            if old_image != recipe.image.name:
+                schedule_image_release(old_image)
+            enqueue(
+                'recipes.process_image', {'recipe_id': recipe.id},
+                self.context['request'].user
+            )
         return recipe
 
     def get_ingredient_list(self, recipe, ingredients):
@@ -257,3 +313,48 @@ class ShoppingCartSerializer(ModelSerializer):
                 'Нельзя добавить рецепт два раза'
             )
         return data
+
+
+class JobSerializer(ModelSerializer):
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'name', 'status', 'attempts', 'result', 'error',
+            'created', 'updated'
+        )
+
+
+class ShoppingListExportSerializer(Serializer):
+    format = ChoiceField(choices=tuple(EXPORT_FORMATS), default='txt')
+
+
+class IdListField(CharField):
+    """Список id через запятую: ?recipes=1,2,3."""
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            ids = [int(item) for item in value.split(',') if item.strip()]
+        except ValueError:
+            raise ValidationError('Ожидаются id через запятую.')
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > settings.BATCH_MAX_IDS:
+            raise ValidationError(f'Не больше {settings.BATCH_MAX_IDS} id.')
+        return ids
+
+
+class BatchQuerySerializer(Serializer):
+    recipes = IdListField(default=list)
+    users = IdListField(default=list)
+    similar = IntegerField(
+        min_value=0, max_value=settings.SIMILAR_RECIPES_TOP_K, default=0
+    )
+
+
+class TrendingQuerySerializer(Serializer):
+    kind = ChoiceField(
+        choices=ActivityKind.choices, default=ActivityKind.FAVORITE
+    )
+    days = IntegerField(min_value=1, max_value=365, default=7)
+    limit = IntegerField(min_value=1, max_value=100, default=10)
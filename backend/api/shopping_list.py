@@ -0,0 +1,110 @@
+import csv
+import hashlib
+import io
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Sum
+from django.utils import timezone
+
+from recipes.models import IngredientsInRecipe
+
+EXPORT_DIR = 'shopping_lists'
+
+
+def get_shopping_list(user_id):
+    return (
+        IngredientsInRecipe.objects
+        .filter(
+            recipe__shopping_cart__user_id=user_id,
+            recipe__deleted__isnull=True,
+        )
+        .values('ingredient__name', 'ingredient__measurement_unit',)
+        .annotate(total_amount=Sum('amount'))
+        .order_by('ingredient__name')
+    )
+
+
+def render_txt(ingredients):
+    shopping_list = ['Список покупок\n\n']
+    for ingredient in ingredients:
+        amount = ingredient['total_amount']
+        name = ingredient['ingredient__name']
+        measurement_unit = ingredient['ingredient__measurement_unit']
+        shopping_list.append(
+            f'{name} - {amount} {measurement_unit}.\n'
+        )
+    return ''.join(shopping_list)
+
+
+def render_csv(ingredients):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(('name', 'measurement_unit', 'amount'))
+    for ingredient in ingredients:
+        writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['total_amount'],
+        ))
+    return output.getvalue()
+
+
+EXPORT_FORMATS = {
+    'txt': (render_txt, 'text/plain'),
+    'csv': (render_csv, 'text/csv'),
+}
+
+
+def get_cart_hash(user_id):
+    """Хеш содержимого корзины: одинаковые корзины дают один файл."""
+    rows = (
+        IngredientsInRecipe.objects
+        .filter(
+            recipe__shopping_cart__user_id=user_id,
+            recipe__deleted__isnull=True,
+        )
+        .order_by('recipe_id', 'ingredient_id')
+        .values_list(
+            'recipe_id', 'ingredient_id', 'amount',
+            'ingredient__name', 'ingredient__measurement_unit'
+        )
+    )
+    digest = hashlib.sha256()
+    for row in rows.iterator():
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def get_export_name(cart_hash, file_format):
+    return f'{EXPORT_DIR}/{cart_hash}.{file_format}'
+
+
+def write_export(user_id, file_format):
+    """
+    Записывает файл для текущего содержимого корзины. Его хеш может
+    отличаться от запрошенного, если корзина изменилась, пока задача
+    ждала в очереди: тогда клиент переходит к новому файлу.
+    """
+    cart_hash = get_cart_hash(user_id)
+    name = get_export_name(cart_hash, file_format)
+    if not default_storage.exists(name):
+        render, _ = EXPORT_FORMATS[file_format]
+        content = render(get_shopping_list(user_id))
+        default_storage.save(name, ContentFile(content.encode()))
+    return cart_hash, name
+
+
+def prune_exports(max_age):
+    """Удаляет файлы списков покупок старше max_age секунд."""
+    border = timezone.now() - timedelta(seconds=max_age)
+    if not default_storage.exists(EXPORT_DIR):
+        return 0
+    deleted = 0
+    for filename in default_storage.listdir(EXPORT_DIR)[1]:
+        name = f'{EXPORT_DIR}/{filename}'
+        if default_storage.get_modified_time(name) < border:
+            default_storage.delete(name)
+            deleted += 1
+    return deleted
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token
+from api.catalogs import invalidate_tag_catalog
+from api.counts import invalidate_recipe_counts, invalidate_user_counts
+from api.documents import invalidate_documents
+from live.events import author_channel, publish
+from recipes.search import invalidate_ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+
+CustomUser = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        invalidate_token(key)
+
+
+def is_login_update(update_fields):
+    return update_fields is not None and set(update_fields) <= {'last_login'}
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_author_documents(sender, instance, created, update_fields,
+                                **kwargs):
+    if created or is_login_update(update_fields):
+        return
+    invalidate_documents(
+        Recipe.objects.filter(author=instance).values('id')
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_document(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_documents([instance.id])
+
+
+@receiver(post_save, sender=Recipe)
+def publish_new_recipe(sender, instance, created, **kwargs):
+    if created:
+        publish(author_channel(instance.author_id), 'recipe', {
+            'id': instance.id,
+            'name': instance.name,
+            'author': instance.author_id,
+        })
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tagged_documents(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_documents([instance.id])
+    elif pk_set:
+        invalidate_documents(pk_set)
+    else:
+        invalidate_documents(instance.recipes.values('id'))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def invalidate_related_documents(sender, instance, **kwargs):
+    invalidate_documents(instance.recipes.values('id'))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    invalidate_tag_catalog()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    invalidate_ingredient_index()
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_counts_on_save(sender, instance, created, **kwargs):
+    if created:
+        invalidate_recipe_counts()
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+def invalidate_counts(sender, **kwargs):
+    invalidate_recipe_counts()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tagged_counts(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_recipe_counts()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_personal_counts(sender, instance, **kwargs):
+    invalidate_user_counts(instance.user_id)
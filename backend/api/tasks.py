@@ -0,0 +1,92 @@
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from api.deletion import purge_recipes, purge_user
+from api.documents import invalidate_documents
+from api.shopping_list import write_export
+from jobs.registry import task
+from recipes.models import Recipe
+from recipes.signals import schedule_image_release
+
+CustomUser = get_user_model()
+
+
+@task('recipes.process_image', priority=5)
+def process_image(recipe_id):
+    """
+    Проверяет и уменьшает изображение рецепта. Файл обрабатывается без
+    блокировки строки рецепта, а результат записывается условным UPDATE:
+    если изображение успели заменить, новый файл не используется.
+    """
+    from PIL import Image, ImageOps
+
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return None
+    with recipe.image.open('rb') as file:
+        Image.open(file).verify()
+    max_side = settings.RECIPE_IMAGE_MAX_SIDE
+    with recipe.image.open('rb') as file:
+        image = Image.open(file)
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        if max(image.size) <= max_side:
+            return {'image': recipe.image.name, 'resized': False}
+        image.thumbnail((max_side, max_side))
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format)
+    old_name = recipe.image.name
+    recipe.image.save(old_name, ContentFile(buffer.getvalue()), save=False)
+    with transaction.atomic():
+        updated = Recipe.objects.filter(pk=recipe_id, image=old_name).update(
+            image=recipe.image.name
+        )
+        # Исходный файл может принадлежать и другим рецептам, а
+        # неиспользованный новый — совпасть с чужим файлом.
+        schedule_image_release(old_name if updated else recipe.image.name)
+    if not updated:
+        return None
+    invalidate_documents([recipe_id])
+    return {'image': recipe.image.name, 'resized': True}
+
+
+@task('recipes.release_image')
+def release_image(name):
+    """
+    Удаляет файл изображения, если на него не ссылается ни один рецепт,
+    в том числе мягко удалённый: такой рецепт ещё можно восстановить.
+    """
+    if Recipe.all_objects.filter(image=name).exists():
+        return {'image': name, 'deleted': False}
+    Recipe._meta.get_field('image').storage.delete(name)
+    return {'image': name, 'deleted': True}
+
+
+@task('recipes.shopping_list_export')
+def export_shopping_list(user_id, file_format, cart_hash):
+    actual_hash, name = write_export(user_id, file_format)
+    return {
+        'requested_hash': cart_hash, 'cart_hash': actual_hash, 'file': name,
+    }
+
+
+@task('recipes.purge_recipe')
+def purge_recipe(recipe_id):
+    if not Recipe.all_objects.filter(
+        pk=recipe_id, deleted__isnull=False
+    ).exists():
+        return None
+    return purge_recipes([recipe_id])
+
+
+@task('users.purge_user')
+def purge_deleted_user(user_id):
+    if not CustomUser.all_objects.filter(
+        pk=user_id, deleted__isnull=False
+    ).exists():
+        return None
+    return purge_user(user_id)
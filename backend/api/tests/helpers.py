@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+
+CustomUser = get_user_model()
+PASSWORD = 'Pass-12345x'
+
+
+def create_user(username, **kwargs):
+    return CustomUser.objects.create_user(
+        email=f'{username}@example.com', username=username,
+        password=PASSWORD, first_name='Имя', last_name='Фамилия', **kwargs
+    )
+
+
+def create_recipe(author, name='Рецепт', **kwargs):
+    kwargs.setdefault('image', 'images/test.png')
+    return Recipe.objects.create(
+        author=author, name=name, text='Текст', cooking_time=5, **kwargs
+    )
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from .helpers import create_user
+
+
+class TokenInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = create_user('alice')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        # Token.delete() обнуляет pk, а pk токена — это его ключ.
+        self.key = self.token.key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    def test_deleted_token_is_rejected(self):
+        self.assertEqual(self.me(), 200)
+        self.token.delete()
+        self.assertEqual(self.me(), 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.me(), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me(), 401)
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache_ignores_stale_local_entry(self):
+        self.assertEqual(self.me(), 200)
+        self.token.delete()
+        # LRU другого процесса, который не узнал об удалении токена.
+        token_cache.set(self.key, self.user)
+        self.assertEqual(self.me(), 401)
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache_serves_known_token_without_queries(self):
+        self.assertEqual(self.me(), 200)
+        with self.assertNumQueries(0):
+            self.client.get('/api/users/me/')
@@ -0,0 +1,96 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, SimilarRecipe
+from users.models import Subscription
+from .helpers import client_for, create_recipe, create_user
+
+URL = '/api/batch/'
+
+
+class BatchTests(TestCase):
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.reader = create_user('reader')
+        self.recipes = [
+            create_recipe(self.author, name=f'Рецепт {number}')
+            for number in range(3)
+        ]
+        self.client = client_for(self.reader)
+
+    def get(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_recipes_and_users_keep_requested_order(self):
+        first, second, _ = self.recipes
+        data = self.get(
+            recipes=f'{second.pk},999999,{first.pk}',
+            users=f'{self.reader.pk},{self.author.pk}',
+            fields='id,name', user_fields='id,username',
+        )
+        self.assertEqual(data['recipes'], [
+            {'id': second.pk, 'name': second.name},
+            {'id': first.pk, 'name': first.name},
+        ])
+        self.assertEqual(data['users'], [
+            {'id': self.reader.pk, 'username': 'reader'},
+            {'id': self.author.pk, 'username': 'author'},
+        ])
+        self.assertNotIn('similar', data)
+
+    def test_viewer_fields_are_filled_for_current_user(self):
+        recipe = self.recipes[0]
+        Favorite.objects.create(user=self.reader, recipe=recipe)
+        Subscription.objects.create(user=self.reader, author=self.author)
+        data = self.get(
+            recipes=str(recipe.pk), users=str(self.author.pk),
+            fields='id,is_favorited', user_fields='id,is_subscribed',
+        )
+        self.assertEqual(
+            data['recipes'], [{'id': recipe.pk, 'is_favorited': True}]
+        )
+        self.assertEqual(
+            data['users'], [{'id': self.author.pk, 'is_subscribed': True}]
+        )
+
+    def test_similar_recipes_are_included_without_deleted_ones(self):
+        first, second, third = self.recipes
+        now = timezone.now()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(
+                recipe=first, similar=similar, score=score, computed=now
+            )
+            for similar, score in ((second, 0.9), (third, 0.5))
+        )
+        Recipe.objects.filter(pk=third.pk).update(deleted=now)
+        data = self.get(recipes=str(first.pk), similar=5, fields='id')
+        self.assertEqual(data['similar'], {str(first.pk): [second.pk]})
+        self.assertEqual(
+            [recipe['id'] for recipe in data['recipes']],
+            [first.pk, second.pk],
+        )
+
+    def test_query_count_does_not_grow_with_ids(self):
+        ids = ','.join(str(recipe.pk) for recipe in self.recipes)
+        users = f'{self.author.pk},{self.reader.pk}'
+        # Прогрев кеша документов рецептов.
+        self.get(recipes=ids, users=users)
+        with CaptureQueriesContext(connection) as one:
+            self.get(
+                recipes=str(self.recipes[0].pk), users=str(self.author.pk)
+            )
+        with CaptureQueriesContext(connection) as many:
+            self.get(recipes=ids, users=users)
+        self.assertEqual(len(many), len(one))
+
+    @override_settings(BATCH_MAX_IDS=2)
+    def test_invalid_ids_are_rejected(self):
+        for recipes in ('1,x', '1,2,3'):
+            with self.subTest(recipes=recipes):
+                response = self.client.get(URL, {'recipes': recipes})
+                self.assertEqual(response.status_code, 400)
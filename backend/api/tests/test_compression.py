@@ -0,0 +1,21 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.compression import choose_encoding
+
+
+@mock.patch('api.compression.brotli', object())
+class ChooseEncodingTests(SimpleTestCase):
+
+    def test_prefers_brotli(self):
+        self.assertEqual(choose_encoding('gzip, br'), 'br')
+        self.assertEqual(choose_encoding('*'), 'br')
+
+    def test_wildcard_does_not_override_explicit_refusal(self):
+        self.assertEqual(choose_encoding('br;q=0, *'), 'gzip')
+        self.assertIsNone(choose_encoding('br;q=0, gzip;q=0, *'))
+
+    def test_wildcard_refusal_keeps_named_encodings(self):
+        self.assertEqual(choose_encoding('gzip, *;q=0'), 'gzip')
+        self.assertIsNone(choose_encoding('identity, *;q=0'))
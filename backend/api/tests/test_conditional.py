@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from recipes.models import Recipe
+from .helpers import client_for, create_recipe, create_user
+
+
+class RecipeConditionalRequestTests(TestCase):
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.recipe = create_recipe(self.author)
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+        self.client = client_for(self.author)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_none_match_accepts_weak_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed_recipe_is_sent_again(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {'name': 'Новое'}, HTTP_IF_MATCH=etag)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_patch_with_stale_if_match_fails(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(
+            self.url, {'name': 'Первое'}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.patch(
+            self.url, {'name': 'Второе'}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Recipe.objects.get(pk=self.recipe.pk).name, 'Первое')
+
+    def test_delete_with_stale_if_match_fails(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {'name': 'Новое'}, HTTP_IF_MATCH=etag)
+        response = self.client.delete(self.url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(Recipe.objects.filter(pk=self.recipe.pk).exists())
@@ -0,0 +1,34 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from recipes.models import Favorite
+from .helpers import client_for, create_recipe, create_user
+
+
+class PersonalRecipeCountTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        author = create_user('author')
+        self.recipes = [
+            create_recipe(author, name=f'Рецепт {number}')
+            for number in range(2)
+        ]
+
+    def favorites(self, user):
+        return client_for(user).get(
+            '/api/recipes/', {'is_favorited': 1}
+        ).json()
+
+    def test_favorite_counts_are_not_shared_between_users(self):
+        alice = create_user('alice')
+        bob = create_user('bob')
+        for recipe in self.recipes:
+            Favorite.objects.create(user=alice, recipe=recipe)
+        Favorite.objects.create(user=bob, recipe=self.recipes[0]).delete()
+
+        self.assertEqual(self.favorites(alice)['count'], 2)
+        data = self.favorites(bob)
+        self.assertEqual(data['count'], 0)
+        self.assertEqual(data['results'], [])
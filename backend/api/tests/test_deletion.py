@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from api.deletion import purge_user, soft_delete_recipe, soft_delete_user
+from api.tasks import release_image
+from recipes.models import Favorite, Recipe
+from .helpers import CustomUser, create_recipe, create_user
+
+
+class PurgeUserTests(TestCase):
+
+    def test_purge_removes_admin_log_entries(self):
+        user = create_user('alice', is_staff=True)
+        recipe = create_recipe(user)
+        Favorite.objects.create(user=create_user('bob'), recipe=recipe)
+        LogEntry.objects.log_action(user.pk, None, None, 'x', ADDITION)
+        soft_delete_user(user)
+
+        counts = purge_user(user.pk)
+
+        self.assertEqual(counts['users'], 1)
+        self.assertEqual(counts['recipes'], 1)
+        self.assertFalse(CustomUser.all_objects.filter(pk=user.pk).exists())
+        self.assertFalse(LogEntry.objects.exists())
+        self.assertFalse(Favorite.objects.exists())
+
+
+class PurgeUnderCliSettingsTests(TransactionTestCase):
+    """purge_deleted так, как его запускает воркер: с backend.settings_cli."""
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('backend.settings_cli настроен на PostgreSQL')
+
+    def test_purge_deleted_command(self):
+        user = create_user('alice', is_staff=True)
+        create_recipe(user)
+        LogEntry.objects.log_action(user.pk, None, None, 'x', ADDITION)
+        soft_delete_user(user)
+
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'purge_deleted',
+             '--older-than', '0'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={
+                key: value for key, value in os.environ.items()
+                if key != 'DJANGO_SETTINGS_MODULE'
+            } | {'POSTGRES_DB': connection.settings_dict['NAME']},
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertFalse(CustomUser.all_objects.filter(pk=user.pk).exists())
+        self.assertFalse(LogEntry.objects.exists())
+
+
+class ReleaseImageTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.storage = Recipe._meta.get_field('image').storage
+        self.name = self.storage.save('images/a.png', ContentFile(b'png'))
+
+    def test_keeps_image_of_soft_deleted_recipe(self):
+        recipe = create_recipe(create_user('alice'), image=self.name)
+        soft_delete_recipe(recipe)
+
+        self.assertEqual(release_image(self.name)['deleted'], False)
+        self.assertTrue(self.storage.exists(self.name))
+
+    def test_deletes_unreferenced_image(self):
+        self.assertEqual(release_image(self.name)['deleted'], True)
+        self.assertFalse(self.storage.exists(self.name))
@@ -0,0 +1,109 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from live.backends import LocalBackend
+from live.stream import EventStream, get_followed_authors
+from live.tickets import issue_ticket, redeem_ticket
+from .helpers import client_for, create_user
+
+TICKETS_URL = '/api/events/tickets/'
+
+
+class EventTicketTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user('alice')
+        self.key = Token.objects.create(user=self.user).key
+
+    def test_ticket_requires_authentication(self):
+        self.assertEqual(client_for().post(TICKETS_URL).status_code, 401)
+
+    def test_ticket_resolves_to_token_without_containing_it(self):
+        client = client_for()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+        response = client.post(TICKETS_URL)
+        self.assertEqual(response.status_code, 201)
+        ticket = response.json()['ticket']
+        self.assertNotIn(self.key, ticket)
+        self.assertEqual(redeem_ticket(ticket), self.key)
+
+    def test_ticket_is_rejected_after_logout(self):
+        ticket = issue_ticket(self.user.id, self.key)
+        Token.objects.filter(key=self.key).delete()
+        self.assertIsNone(redeem_ticket(ticket))
+
+    def test_tampered_and_expired_tickets_are_rejected(self):
+        ticket = issue_ticket(self.user.id, self.key)
+        self.assertIsNone(redeem_ticket(ticket[:-1] + 'x'))
+        with override_settings(LIVE_TICKET_TTL=-1):
+            self.assertIsNone(redeem_ticket(ticket))
+
+
+# Как и тестовый клиент Django, не закрываем соединение внутри
+# транзакции TestCase.
+@mock.patch('live.stream.close_old_connections', lambda: None)
+@mock.patch('live.stream.get_backend', LocalBackend)
+@override_settings(LIVE_KEEPALIVE=0.01, LIVE_AUTH_RECHECK=0)
+class EventStreamAuthTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user('alice')
+        self.key = Token.objects.create(user=self.user).key
+
+    def run_stream(self, query_string=b'', on_body=None):
+        sent = []
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+            if on_body and message['type'] == 'http.response.body':
+                await on_body()
+
+        scope = {
+            'type': 'http', 'path': '/api/events/', 'headers': [],
+            'query_string': query_string,
+        }
+
+        async def run():
+            await asyncio.wait_for(EventStream()(scope, receive, send), 5)
+
+        async_to_sync(run)()
+        return sent
+
+    def test_token_in_query_string_is_rejected(self):
+        sent = self.run_stream(f'token={self.key}'.encode())
+        self.assertEqual(sent[0]['status'], 401)
+
+    def test_stream_closes_after_logout(self):
+        ticket = issue_ticket(self.user.id, self.key)
+
+        @sync_to_async
+        def logout():
+            Token.objects.filter(key=self.key).delete()
+
+        sent = self.run_stream(f'ticket={ticket}'.encode(), logout)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_database_work_checks_connections(self):
+        calls = []
+
+        def query(**kwargs):
+            calls.append('query')
+            return mock.MagicMock()
+
+        with mock.patch(
+            'live.stream.close_old_connections',
+            lambda: calls.append('close'),
+        ), mock.patch(
+            'live.stream.Subscription.objects.filter',
+            side_effect=query,
+        ):
+            async_to_sync(get_followed_authors)(self.user.id)
+        self.assertEqual(calls, ['close', 'query', 'close'])
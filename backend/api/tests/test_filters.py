@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from api import filters
+from recipes.models import Tag
+from .helpers import client_for, create_recipe, create_user
+
+
+class TagFilterTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        author = create_user('author')
+        self.lunch = Tag.objects.create(
+            name='Обед', color='#E26C2D', slug='lunch'
+        )
+        self.dinner = Tag.objects.create(
+            name='Ужин', color='#49B64E', slug='dinner'
+        )
+        self.both = create_recipe(author, name='Оба')
+        self.both.tags.set([self.lunch, self.dinner])
+        self.lunch_only = create_recipe(author, name='Обед')
+        self.lunch_only.tags.set([self.lunch])
+        create_recipe(author, name='Без тегов')
+
+    def names(self, **params):
+        response = client_for().get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return {recipe['name'] for recipe in response.json()['results']}
+
+    def test_any_and_all(self):
+        tags = ['lunch', 'dinner']
+        self.assertEqual(self.names(tags=tags), {'Оба', 'Обед'})
+        self.assertEqual(self.names(tags=tags, tags_match='all'), {'Оба'})
+
+    def test_tags_missing_from_catalog_do_not_match_everything(self):
+        catalog = filters.get_tag_catalog()
+        stale = {
+            slug: tag for slug, tag in catalog.items() if slug != 'dinner'
+        }
+        with mock.patch.object(filters, 'get_tag_catalog', lambda: stale):
+            self.assertEqual(
+                self.names(tags=['dinner'], tags_match='all'), {'Оба'}
+            )
+            self.assertEqual(
+                self.names(tags=['lunch', 'dinner'], tags_match='all'),
+                {'Оба'},
+            )
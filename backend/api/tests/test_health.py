@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+
+from .helpers import client_for, create_user
+
+URL = '/api/health/'
+
+
+class HealthTests(TestCase):
+
+    def test_anonymous_gets_only_status(self):
+        response = client_for().get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_regular_user_gets_only_status(self):
+        response = client_for(create_user('alice')).get(URL)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_staff_gets_checks(self):
+        response = client_for(create_user('admin', is_staff=True)).get(URL)
+        data = response.json()
+        self.assertEqual(data['status'], 'ok')
+        self.assertTrue(data['database']['ok'])
+        self.assertTrue(data['cache']['ok'])
+
+    def test_failure_does_not_leak_error_text(self):
+        with mock.patch(
+            'django.db.backends.utils.CursorWrapper.execute',
+            side_effect=DatabaseError('password authentication failed'),
+        ), self.assertLogs('api.health', 'WARNING'):
+            response = client_for().get(URL)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'status': 'error'})
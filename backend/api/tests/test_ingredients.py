@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from recipes.models import Ingredient
+from recipes.search import invalidate_ingredient_index
+from .helpers import client_for
+
+
+class IngredientApiTests(TestCase):
+
+    def setUp(self):
+        for name in ('Мука', 'Мука ржаная', 'Картофель', 'Перец черный'):
+            Ingredient.objects.create(
+                name=name, measurement_unit='г', kcal=1, price=2
+            )
+        invalidate_ingredient_index()
+
+    def search(self, name, **params):
+        response = client_for().get(
+            '/api/ingredients/', {'name': name, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.json()]
+
+    def test_payload_has_public_fields_only(self):
+        ingredient = client_for().get('/api/ingredients/').json()[0]
+        self.assertEqual(
+            set(ingredient), {'id', 'name', 'measurement_unit'}
+        )
+
+    def test_search_ranks_prefix_word_and_typo_matches(self):
+        self.assertEqual(self.search('мука'), ['Мука', 'Мука ржаная'])
+        self.assertEqual(self.search('черн'), ['Перец черный'])
+        self.assertEqual(self.search('кортофель'), ['Картофель'])
+        self.assertEqual(self.search('мука', limit=1), ['Мука'])
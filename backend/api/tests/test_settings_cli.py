@@ -0,0 +1,18 @@
+import importlib
+
+from django.apps import apps
+from django.test import SimpleTestCase
+
+
+class CliSettingsTests(SimpleTestCase):
+
+    def test_apps_with_models_stay_installed(self):
+        # Без модели приложения Django не знает о её внешних ключах и не
+        # каскадирует на её таблицу удаление пользователей и рецептов.
+        settings_cli = importlib.import_module('backend.settings_cli')
+        installed = {
+            app.split('.apps.')[0] for app in settings_cli.INSTALLED_APPS
+        }
+        for app_config in apps.get_app_configs():
+            if list(app_config.get_models()):
+                self.assertIn(app_config.name, installed)
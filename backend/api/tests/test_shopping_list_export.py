@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import TestCase, override_settings
+
+from api.shopping_list import EXPORT_DIR, prune_exports
+from jobs.models import Job
+from jobs.queue import run_job_by_id
+from recipes.models import Ingredient, IngredientsInRecipe, ShoppingCart
+from .helpers import client_for, create_recipe, create_user
+
+URL = '/api/shopping-list-exports/'
+
+
+class ShoppingListExportTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, USE_X_ACCEL_REDIRECT=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
+
+        self.user = create_user('alice')
+        self.client = client_for(self.user)
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        self.recipes = []
+        for number in range(2):
+            recipe = create_recipe(self.user, name=f'Рецепт {number}')
+            IngredientsInRecipe.objects.create(
+                recipe=recipe, ingredient=salt, amount=number + 1
+            )
+            self.recipes.append(recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[0])
+
+    def test_export_follows_cart_changed_before_job_ran(self):
+        requested = self.client.post(URL, {'format': 'txt'}).json()
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[1])
+        self.assertEqual(run_job_by_id(requested['job']), Job.DONE)
+
+        export = self.client.get(f'{URL}{requested["id"]}/').json()
+        self.assertEqual(export['status'], Job.DONE)
+        self.assertNotEqual(export['replaced_by'], requested['id'])
+        response = self.client.get(export['download'])
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Соль - 3 г.', content)
+
+    def test_jobs_of_other_users_are_not_visible(self):
+        requested = self.client.post(URL, {'format': 'txt'}).json()
+        other = client_for(create_user('bob'))
+        response = other.get(f'{URL}{requested["id"]}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_old_files_are_pruned(self):
+        requested = self.client.post(URL, {'format': 'csv'}).json()
+        run_job_by_id(requested['job'])
+        path = os.path.join(self.media_root, EXPORT_DIR, requested['id'])
+        self.assertEqual(prune_exports(60), 0)
+        hour_ago = time.time() - 3600
+        os.utime(path, (hour_ago, hour_ago))
+
+        self.assertEqual(prune_exports(60), 1)
+        self.assertFalse(os.path.exists(path))
+        export = self.client.post(URL, {'format': 'csv'}).json()
+        self.assertEqual(export['status'], Job.QUEUED)
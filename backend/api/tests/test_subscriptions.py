@@ -0,0 +1,32 @@
+import warnings
+
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import TestCase
+
+from users.models import Subscription
+from .helpers import client_for, create_recipe, create_user
+
+
+class SubscriptionListTests(TestCase):
+
+    def test_subscriptions_are_ordered_by_username(self):
+        user = create_user('reader')
+        for username in ('carol', 'alice', 'bob'):
+            author = create_user(username)
+            create_recipe(author)
+            Subscription.objects.create(user=user, author=author)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            response = client_for(user).get('/api/users/subscriptions/')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(
+            [author['username'] for author in results],
+            ['alice', 'bob', 'carol'],
+        )
+        self.assertEqual(
+            {author['recipes_count'] for author in results}, {1}
+        )
+        self.assertTrue(all(author['is_subscribed'] for author in results))
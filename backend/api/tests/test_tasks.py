@@ -0,0 +1,61 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api import tasks
+from recipes.models import Recipe
+from .helpers import create_recipe, create_user
+
+
+def png(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', (size, size), 'red').save(buffer, format='PNG')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(RECIPE_IMAGE_MAX_SIDE=10)
+class ProcessImageTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        image = default_storage.save('images/big.png', png(40))
+        self.recipe = create_recipe(create_user('author'), image=image)
+
+    def test_large_image_is_resized(self):
+        result = tasks.process_image(self.recipe.pk)
+        self.assertTrue(result['resized'])
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.image.name, result['image'])
+        with recipe.image.open('rb') as file:
+            self.assertEqual(Image.open(file).size, (10, 10))
+
+    def test_image_replaced_during_resize_is_kept(self):
+        replacement = default_storage.save('images/new.png', png(5))
+        original_thumbnail = Image.Image.thumbnail
+
+        def replace_then_resize(image, *args, **kwargs):
+            Recipe.objects.filter(pk=self.recipe.pk).update(
+                image=replacement
+            )
+            return original_thumbnail(image, *args, **kwargs)
+
+        with mock.patch.object(
+            Image.Image, 'thumbnail', replace_then_resize
+        ), mock.patch.object(tasks, 'schedule_image_release') as release:
+            self.assertIsNone(tasks.process_image(self.recipe.pk))
+
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.image.name, replacement)
+        released, = release.call_args.args
+        self.assertNotEqual(released, replacement)
+        self.assertNotEqual(released, 'images/big.png')
@@ -0,0 +1,108 @@
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from api.throttling import CacheBucketStore, bucket_store
+from .helpers import client_for, create_recipe, create_user
+
+RATES = {
+    'favorite': '3/min',
+    'user_create': '100/hour',
+    'user_create_ip': '2/hour',
+}
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES,
+})
+class ThrottleScopeTests(TestCase):
+
+    def setUp(self):
+        bucket_store._data.clear()
+        self.addCleanup(bucket_store._data.clear)
+        author = create_user('author')
+        self.recipes = [
+            create_recipe(author, name=f'Рецепт {number}')
+            for number in range(4)
+        ]
+
+    def favorite(self, user, recipe, address='10.0.0.1'):
+        return client_for(user).post(
+            f'/api/recipes/{recipe.pk}/favorite/',
+            HTTP_X_FORWARDED_FOR=address,
+        ).status_code
+
+    def test_user_rate_applies_per_user(self):
+        user = create_user('alice')
+        statuses = [self.favorite(user, recipe) for recipe in self.recipes]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+
+    def test_users_behind_one_address_do_not_share_user_rate(self):
+        # Для favorite нет частоты favorite_ip: лимит только на пользователя.
+        statuses = {
+            self.favorite(create_user(f'user{number}'), self.recipes[0])
+            for number in range(5)
+        }
+        self.assertEqual(statuses, {201})
+
+    def create_user_from(self, forwarded_for, number):
+        return client_for().post('/api/users/', {
+            'email': f'new{number}@example.com',
+            'username': f'new{number}',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': 'Pass-12345x',
+        }, HTTP_X_FORWARDED_FOR=forwarded_for).status_code
+
+    def test_ip_rate_uses_address_added_by_proxy(self):
+        # nginx ставит адрес клиента последним: начало заголовка,
+        # присланное клиентом, не даёт новой корзины.
+        statuses = [
+            self.create_user_from(f'192.0.2.{number}, 10.0.0.1', number)
+            for number in range(3)
+        ]
+        self.assertEqual(statuses, [201, 201, 429])
+
+
+class SlowCache:
+    """Кеш, медленно отвечающий на get: расширяет окно гонки."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, *args, **kwargs):
+        value = self.cache.get(*args, **kwargs)
+        time.sleep(0.01)
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+
+@override_settings(THROTTLE_LOCK_WAIT=5)
+class CacheBucketStoreTests(TestCase):
+
+    def test_concurrent_requests_do_not_exceed_capacity(self):
+        cache = SlowCache(caches['default'])
+        cache.delete('throttle:test')
+        self.addCleanup(cache.delete, 'throttle:test')
+        store = CacheBucketStore('default')
+        results = []
+
+        def consume():
+            results.append(
+                store.consume('throttle:test', 5, 5 / 3600, time.time())[1]
+            )
+
+        with mock.patch('api.throttling.caches', {'default': cache}):
+            threads = [threading.Thread(target=consume) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results.count(True), 5)
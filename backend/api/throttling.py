@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from caching.shared import cache_lock
+
+
+def parse_rate(rate):
+    """'30/min' → (ёмкость корзины, токенов в секунду)."""
+    num, period = rate.split('/')
+    seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return int(num), int(num) / seconds
+
+
+class LocalBucketStore:
+    """Ограниченное по размеру хранилище корзин внутри процесса."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self._lock:
+            tokens, updated = self._data.pop(key, (capacity, now))
+            tokens, allowed = refill_and_take(
+                tokens, updated, capacity, refill_rate, now
+            )
+            self._data[key] = (tokens, now)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            return tokens, allowed
+
+
+class CacheBucketStore:
+    """
+    Корзины в общем кеше: лимиты действуют на все процессы.
+
+    Чтение и запись корзины идут под блокировкой её ключа, иначе
+    параллельные запросы читали бы одно и то же число токенов.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def consume(self, key, capacity, refill_rate, now):
+        cache = caches[self.alias]
+        with cache_lock(
+            key, settings.THROTTLE_LOCK_TIMEOUT, settings.THROTTLE_LOCK_WAIT,
+            cache, poll=settings.THROTTLE_LOCK_POLL_INTERVAL,
+        ) as locked:
+            if not locked:
+                # Корзину не отпускают другие запросы того же ключа:
+                # пропустить запрос значило бы обойти лимит.
+                return 0, False
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens, allowed = refill_and_take(
+                tokens, updated, capacity, refill_rate, max(now, updated)
+            )
+            cache.set(
+                key, (tokens, max(now, updated)),
+                int(capacity / refill_rate) + 1
+            )
+        return tokens, allowed
+
+
+def refill_and_take(tokens, updated, capacity, refill_rate, now):
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, True
+    return tokens, False
+
+
+def get_bucket_store():
+    if settings.THROTTLE_CACHE_ALIAS:
+        return CacheBucketStore(settings.THROTTLE_CACHE_ALIAS)
+    return LocalBucketStore(settings.THROTTLE_LOCAL_MAX_KEYS)
+
+
+bucket_store = get_bucket_store()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket по области view.throttle_scope.
+
+    Частота задаётся в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] в формате
+    DRF ('30/min'): число — ёмкость корзины, которая полностью
+    пополняется за период.
+    """
+
+    rate_suffix = ''
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError
+
+    def get_rate(self, scope):
+        # Без частоты '<scope>_ip' лимита по адресу нет: иначе все
+        # пользователи за одним NAT делили бы одну пользовательскую корзину.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(
+            f'{scope}{self.rate_suffix}'
+        )
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = self.get_rate(scope)
+        if rate is None:
+            return True
+        self.capacity, self.refill_rate = parse_rate(rate)
+        key = f'throttle:{scope}:{self.get_cache_key(request, view)}'
+        self.tokens, allowed = bucket_store.consume(
+            key, self.capacity, self.refill_rate, time.time()
+        )
+        return allowed
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'anon:{self.get_ident(request)}'
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Общий лимит для адреса; частота берётся из '<scope>_ip'."""
+
+    rate_suffix = '_ip'
+
+    def get_cache_key(self, request, view):
+        return f'ip:{self.get_ident(request)}'
+
+
+class ScopedActionThrottleMixin:
+    """Включает троттлинг для действий из throttle_scopes."""
+
+    throttle_scopes = {}
+    throttle_scope = None
+
+    def get_throttles(self):
+        self.throttle_scope = self.throttle_scopes.get(self.action)
+        if self.throttle_scope is None:
+            return super().get_throttles()
+        return [UserTokenBucketThrottle(), IPTokenBucketThrottle()]
@@ -1,9 +1,11 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
+from djoser.views import TokenCreateView, TokenDestroyView
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    IngredientViewSet, RecipeViewSet,
-    TagViewSet, CustomUserViewSet
+    ActivityViewSet, BatchViewSet, EventTicketViewSet, HealthViewSet,
+    IngredientViewSet, JobViewSet, RecipeViewSet, ShoppingListExportViewSet,
+    TagViewSet, TelemetryViewSet, CustomUserViewSet
 )
 
 app_name = 'api'
@@ -14,8 +16,25 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('tags', TagViewSet, basename='tags')
 router.register(
     'ingredients', IngredientViewSet, basename='ingredients')
+router.register('jobs', JobViewSet, basename='jobs')
+router.register('activity', ActivityViewSet, basename='activity')
+router.register('batch', BatchViewSet, basename='batch')
+router.register('telemetry', TelemetryViewSet, basename='telemetry')
+router.register('health', HealthViewSet, basename='health')
+router.register(
+    'events/tickets', EventTicketViewSet, basename='event-tickets')
+router.register(
+    'shopping-list-exports', ShoppingListExportViewSet,
+    basename='shopping-list-exports')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('auth/', include('djoser.urls.authtoken')),
+    # Маршруты djoser.urls.authtoken без импорта пакета djoser.urls,
+    # который при загрузке строит собственный роутер пользователей.
+    re_path(
+        r'^auth/token/login/?$', TokenCreateView.as_view(), name='login'
+    ),
+    re_path(
+        r'^auth/token/logout/?$', TokenDestroyView.as_view(), name='logout'
+    ),
 ]
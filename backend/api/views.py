@@ -1,39 +1,88 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import (
+    BooleanField, Count, Exists, OuterRef, Q, Value
+)
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (
+    AllowAny, IsAdminUser, IsAuthenticated
+)
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import (
+    ModelViewSet, ReadOnlyModelViewSet, ViewSet
+)
 
 from api.serializers import (
-    FavoriteSerializer, IngredientSerializer, RecipeReadSerializer,
-    RecipeCreateUpdateSerializer, RecipeForOtherModelsSerializer,
-    ShoppingCartSerializer, SubscriptionCreateSerializer,
-    SubscriptionReadSerializer, TagSerializer,
+    BatchQuerySerializer, FavoriteSerializer, IngredientSerializer,
+    RecipeReadSerializer, RecipeCreateUpdateSerializer,
+    RecipeForOtherModelsSerializer, JobSerializer, ShoppingCartSerializer,
+    ShoppingListExportSerializer,
+    SubscriptionCreateSerializer, SubscriptionReadSerializer, TagSerializer,
+    TrendingQuerySerializer,
 )
+from api.batch import resolve_batch
+from api.conditional import (
+    PreconditionFailed, check_if_match, none_match, recipe_etag
+)
+from api.counts import recipe_count_key
+from api.deletion import soft_delete_recipe, soft_delete_user
 from api.filters import IngredientsFilter, RecipesFilter
+from api.health import check_health
 from api.paginators import RecipesLimitPaginator
 from api.permissions import IsAuthorOrReadOnly
+from api.documents import get_documents
+from api.throttling import ScopedActionThrottleMixin
+from api.shopping_list import (
+    EXPORT_FORMATS, get_cart_hash, get_export_name, get_shopping_list,
+    render_txt
+)
+from api.representations import (
+    USER_FIELDS, get_requested_fields, overlay_viewer_fields
+)
+from activity.buffer import record_event
+from activity.models import ActivityKind
+from activity.rollups import get_trending
+from jobs.models import Job
+from jobs.queue import enqueue
+from live.tickets import issue_ticket
 from recipes.models import (
-    Favorite, Ingredient, IngredientsInRecipe,
-    Recipe, ShoppingCart, Tag
+    Favorite, Ingredient, Recipe, ShoppingCart, SimilarRecipe, Tag
 )
+from telemetry.recorder import current_report
 from users.models import Subscription
 
 CustomUser = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(ScopedActionThrottleMixin, UserViewSet):
 
     http_method_names = ('get', 'post', 'delete')
+    throttle_scopes = {
+        'create': 'user_create',
+        'subscribe': 'subscribe',
+    }
     pagination_class = RecipesLimitPaginator
     permission_classes = (AllowAny, )
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.action in ('list', 'retrieve') and user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscription.objects.filter(user=user, author=OuterRef('pk'))
+            ))
+        return queryset
+
+    def perform_destroy(self, instance):
+        soft_delete_user(instance)
+
     @action(
         detail=True,
         methods=('post', 'delete'),
@@ -46,7 +95,11 @@ class CustomUserViewSet(UserViewSet):
             user=user, author=author
         )
         if request.method == 'DELETE':
-            subscription.delete
+            deleted, _ = subscription.delete()
+            if deleted:
+                record_event(
+                    ActivityKind.SUBSCRIPTION, user.id, author.id, -1
+                )
             return Response(
                 'Вы отписались от этого автора',
                 status=status.HTTP_204_NO_CONTENT
@@ -58,6 +111,7 @@ class CustomUserViewSet(UserViewSet):
         )
         create_serializer.is_valid()
         create_serializer.save()
+        record_event(ActivityKind.SUBSCRIPTION, user.id, author.id, 1)
         read_serializer = SubscriptionReadSerializer(
             author,
             context={'request': request}
@@ -72,7 +126,15 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = CustomUser.objects.filter(subscriptions_author__user=user)
+        # Запросы с GROUP BY не наследуют Meta.ordering.
+        queryset = CustomUser.objects.filter(
+            subscriptions_author__user=user
+        ).annotate(
+            recipes_count=Count(
+                'recipes', filter=Q(recipes__deleted__isnull=True)
+            ),
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).order_by(*CustomUser._meta.ordering)
         pages = self.paginate_queryset(queryset)
         serializer = SubscriptionReadSerializer(
             pages, many=True, context={'request': request}
@@ -92,10 +154,16 @@ class TagViewSet(ModelViewSet):
     serializer_class = TagSerializer
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(ScopedActionThrottleMixin, ModelViewSet):
 
     queryset = Recipe.objects.all()
     http_method_names = ('get', 'post', 'patch', 'delete')
+    throttle_scopes = {
+        'create': 'recipe_write',
+        'partial_update': 'recipe_write',
+        'favorite': 'favorite',
+        'shopping_cart': 'shopping_cart',
+    }
     permission_classes = (IsAuthorOrReadOnly, )
     pagination_class = RecipesLimitPaginator
     filter_backends = (DjangoFilterBackend, )
@@ -106,7 +174,84 @@ class RecipeViewSet(ModelViewSet):
             return RecipeReadSerializer
         return RecipeCreateUpdateSerializer
 
-    def add_delete_recipe(self, serializer, pk, request, model):
+    def represent(self, recipe_ids):
+        return overlay_viewer_fields(
+            get_documents(recipe_ids),
+            self.request,
+            get_requested_fields(self.request)
+        )
+
+    def get_count_cache_key(self):
+        if self.action == 'list':
+            return recipe_count_key(self.request)
+        return None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(
+            self.get_queryset()
+        ).values_list('id', flat=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.represent(page))
+        return Response(self.represent(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(self.kwargs['pk'])
+        except ValueError:
+            raise Http404
+        return self.detail_response(pk)
+
+    def detail_response(self, pk, status_code=status.HTTP_200_OK):
+        """Представление рецепта с ETag; 304, если оно есть у клиента."""
+        documents = get_documents([pk])
+        if not documents:
+            raise Http404
+        data = overlay_viewer_fields(
+            documents, self.request, get_requested_fields(self.request)
+        )[0]
+        etag = recipe_etag(pk, documents[0]['version'], data)
+        if status_code == status.HTTP_200_OK and none_match(
+            self.request, etag
+        ):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        return Response(data, status=status_code, headers={'ETag': etag})
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('partial_update', 'destroy'):
+            # Для изменения нужны только автор, версия и старое изображение.
+            queryset = queryset.only('id', 'author_id', 'version', 'image')
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return self.detail_response(
+            serializer.instance.pk, status.HTTP_201_CREATED
+        )
+
+    def partial_update(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        check_if_match(request, recipe)
+        serializer = self.get_serializer(
+            recipe, data=request.data, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return self.detail_response(recipe.pk)
+
+    def destroy(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        check_if_match(request, recipe)
+        if not soft_delete_recipe(recipe, version=recipe.version):
+            raise PreconditionFailed
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def add_delete_recipe(self, serializer, pk, request, model, kind):
         user = request.user
         recipe = get_object_or_404(Recipe, pk=pk)
         object = model.objects.filter(user=user, recipe=recipe)
@@ -117,6 +262,7 @@ class RecipeViewSet(ModelViewSet):
                     'Такого рецепта нет',
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            record_event(kind, user.id, recipe.id, -1)
             return Response(
                 'Рецепт удален из корзины',
                 status=status.HTTP_204_NO_CONTENT
@@ -128,6 +274,7 @@ class RecipeViewSet(ModelViewSet):
         )
         create_serializer.is_valid()
         create_serializer.save()
+        record_event(kind, user.id, recipe.id, 1)
         read_serializer = RecipeForOtherModelsSerializer(
             recipe,
             context={'request': request}
@@ -139,14 +286,65 @@ class RecipeViewSet(ModelViewSet):
     def favorite(self, request, pk):
         serializer = FavoriteSerializer
         model = Favorite
-        return self.add_delete_recipe(serializer, pk, request, model)
+        return self.add_delete_recipe(
+            serializer, pk, request, model, ActivityKind.FAVORITE
+        )
 
     @action(detail=True, methods=['post', 'delete'],
             permission_classes=[IsAuthenticated, ])
     def shopping_cart(self, request, pk):
         serializer = ShoppingCartSerializer
         model = ShoppingCart
-        return self.add_delete_recipe(serializer, pk, request, model)
+        return self.add_delete_recipe(
+            serializer, pk, request, model, ActivityKind.SHOPPING_CART
+        )
+
+    @action(detail=True, methods=('get', ))
+    def similar(self, request, pk):
+        limit = request.query_params.get('limit')
+        neighbors = (
+            SimilarRecipe.objects
+            .filter(recipe_id=pk, similar__deleted__isnull=True)
+            .select_related('similar')
+            .order_by('-score')
+        )
+        if limit and limit.isdigit():
+            neighbors = neighbors[:int(limit)]
+        serializer = RecipeForOtherModelsSerializer(
+            [neighbor.similar for neighbor in neighbors],
+            many=True,
+            context={'request': request}
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, methods=('get', ))
+    def nutrition(self, request, pk):
+        from recipes.nutrition import recipe_nutrition
+
+        recipe = get_object_or_404(Recipe, pk=pk)
+        return Response(recipe_nutrition(recipe.id))
+
+    @action(
+        detail=False,
+        methods=('GET',),
+        url_path='shopping_cart/nutrition',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_nutrition(self, request):
+        from recipes.nutrition import shopping_cart_nutrition
+
+        return Response(shopping_cart_nutrition(request.user.id))
+
+    @action(
+        detail=False,
+        methods=('GET',),
+        url_path='favorites/nutrition',
+        permission_classes=[IsAuthenticated]
+    )
+    def favorites_nutrition(self, request):
+        from recipes.nutrition import favorites_nutrition
+
+        return Response(favorites_nutrition(request.user.id))
 
     @action(
         detail=False,
@@ -154,30 +352,209 @@ class RecipeViewSet(ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredients = (
-            IngredientsInRecipe.objects
-            .filter(recipe__shopping_cart__user=user)
-            .values('ingredient__name', 'ingredient__measurement_unit',)
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
-        )
+        ingredients = get_shopping_list(request.user.id)
         return self.print_shopping_list_txt_file(ingredients)
 
     def print_shopping_list_txt_file(self, ingredients):
-        shopping_list = ['Список покупок\n\n']
-        for ingredient in ingredients:
-            amount = ingredient['total_amount']
-            name = ingredient['ingredient__name']
-            measurement_unit = ingredient['ingredient__measurement_unit']
-            shopping_list.append(
-                f'{name} - {amount} {measurement_unit}.\n'
-            )
-
         return HttpResponse(
-            shopping_list,
+            render_txt(ingredients),
             {
                 "Content-Type": "text/plain",
                 "Content-Disposition": "attachment; filename='shop_list.txt'",
             },
         )
+
+
+class JobViewSet(ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated, )
+    pagination_class = RecipesLimitPaginator
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+
+class ActivityViewSet(ViewSet):
+    """Аналитика по дневным итогам журнала активности."""
+
+    permission_classes = (AllowAny, )
+
+    @action(detail=False, methods=('get', ))
+    def trending(self, request):
+        serializer = TrendingQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(get_trending(**serializer.validated_data))
+
+
+class BatchViewSet(ViewSet):
+    """
+    Рецепты и пользователи одним запросом:
+    ?recipes=1,2&users=3&similar=3&fields=id,name&user_fields=id,username.
+    """
+
+    permission_classes = (AllowAny, )
+
+    def list(self, request):
+        serializer = BatchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(resolve_batch(
+            request,
+            recipe_ids=serializer.validated_data['recipes'],
+            user_ids=serializer.validated_data['users'],
+            similar=serializer.validated_data['similar'],
+            recipe_fields=get_requested_fields(request),
+            user_fields=get_requested_fields(
+                request, USER_FIELDS, 'user_fields'
+            ),
+        ))
+
+
+class HealthViewSet(ViewSet):
+    """
+    Готовность реплики: 200, если БД и кеш отвечают, иначе 503.
+    Результаты отдельных проверок видят только сотрудники.
+    """
+
+    permission_classes = (AllowAny, )
+    throttle_classes = ()
+
+    def list(self, request):
+        ok, data = check_health()
+        if not request.user.is_staff:
+            data = {'status': data['status']}
+        return Response(
+            data,
+            status=status.HTTP_200_OK if ok
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class TelemetryViewSet(ViewSet):
+    """Задержки маршрутов и медленные запросы по всем процессам."""
+
+    permission_classes = (IsAdminUser, )
+
+    def list(self, request):
+        return Response(current_report())
+
+
+class EventTicketViewSet(ViewSet):
+    """Короткоживущий билет для подключения EventSource к потоку."""
+
+    permission_classes = (IsAuthenticated, )
+
+    def create(self, request):
+        return Response(
+            {'ticket': issue_ticket(request.user.id, request.auth)},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class ShoppingListExportViewSet(ViewSet):
+    """
+    Файлы списка покупок, которые готовятся в фоне.
+
+    Файл называется по хешу содержимого корзины, поэтому одинаковые
+    корзины используют один и тот же файл, а повторные скачивания
+    отдаёт nginx через X-Accel-Redirect. Если корзина изменилась, пока
+    задача ждала в очереди, выгрузка ссылается на файл нового
+    содержимого в поле replaced_by.
+    """
+
+    permission_classes = (IsAuthenticated, )
+    lookup_value_regex = (
+        r'[0-9a-f]{64}\.(?:' + '|'.join(EXPORT_FORMATS) + ')'
+    )
+
+    def get_export(self, cart_hash, file_format):
+        export_id = f'{cart_hash}.{file_format}'
+        export = {
+            'id': export_id,
+            'format': file_format,
+            'status': None,
+            'job': None,
+            'download': None,
+            'replaced_by': None,
+        }
+        if default_storage.exists(get_export_name(cart_hash, file_format)):
+            export['status'] = Job.DONE
+            export['download'] = self.get_download_url(export_id)
+            return export
+        # Индекс по user_id сужает выборку до задач пользователя.
+        job = Job.objects.filter(
+            user=self.request.user,
+            name='recipes.shopping_list_export',
+            payload__cart_hash=cart_hash,
+            payload__file_format=file_format,
+        ).order_by('-created').first()
+        if job is None:
+            return export
+        if job.status == Job.DONE:
+            actual_hash = job.result['cart_hash']
+            if actual_hash == cart_hash or not default_storage.exists(
+                get_export_name(actual_hash, file_format)
+            ):
+                # Файл уже удалён prune_exports: выгрузку нужно повторить.
+                return export
+            export['replaced_by'] = f'{actual_hash}.{file_format}'
+            export['download'] = self.get_download_url(export['replaced_by'])
+        export['status'] = job.status
+        export['job'] = job.id
+        return export
+
+    def get_download_url(self, export_id):
+        return self.request.build_absolute_uri(reverse(
+            'api:shopping-list-exports-download', args=(export_id, )
+        ))
+
+    def create(self, request):
+        serializer = ShoppingListExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file_format = serializer.validated_data['format']
+        cart_hash = get_cart_hash(request.user.id)
+        export = self.get_export(cart_hash, file_format)
+        if export['download'] is None and export['status'] not in (
+            Job.QUEUED, Job.RUNNING
+        ):
+            job = enqueue(
+                'recipes.shopping_list_export',
+                {
+                    'user_id': request.user.id,
+                    'file_format': file_format,
+                    'cart_hash': cart_hash,
+                },
+                request.user
+            )
+            export.update(status=job.status, job=job.id)
+        if export['status'] == Job.DONE:
+            return Response(export, status=status.HTTP_200_OK)
+        return Response(export, status=status.HTTP_202_ACCEPTED)
+
+    def retrieve(self, request, pk=None):
+        cart_hash, file_format = pk.split('.')
+        export = self.get_export(cart_hash, file_format)
+        if export['status'] is None:
+            raise Http404
+        return Response(export)
+
+    @action(detail=True, methods=('get', ))
+    def download(self, request, pk=None):
+        cart_hash, file_format = pk.split('.')
+        name = get_export_name(cart_hash, file_format)
+        if not default_storage.exists(name):
+            raise Http404
+        _, content_type = EXPORT_FORMATS[file_format]
+        filename = f'shop_list.{file_format}'
+        if settings.USE_X_ACCEL_REDIRECT:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = (
+                f'{settings.PROTECTED_MEDIA_URL}{name}'
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="{filename}"'
+            )
+            return response
+        return FileResponse(
+            default_storage.open(name), as_attachment=True,
+            filename=filename, content_type=content_type
+        )
@@ -9,8 +9,23 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from live.stream import EventStream  # noqa: E402
+
+event_stream = EventStream()
+
+
+async def application(scope, receive, send):
+    if (
+        scope['type'] == 'http'
+        and scope['path'] == settings.LIVE_EVENTS_PATH
+    ):
+        await event_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -33,11 +33,17 @@ INSTALLED_APPS = [
     'colorfield',
     'api',
     'recipes',
-    'users'
+    'users',
+    'jobs',
+    'activity',
+    'telemetry',
 ]
 
 MIDDLEWARE = [
+    'telemetry.middleware.TelemetryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.LoadSheddingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,10 +90,36 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
     }
 }
 
+# Кеш
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# Без CACHE_BACKEND каждый процесс держит свой локальный кеш: этого
+# хватает для одного контейнера и тестов. Несколько реплик backend
+# должны делить общий кеш, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache.
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', LOCAL_CACHE_BACKEND)
+SHARED_CACHE = CACHE_BACKEND != LOCAL_CACHE_BACKEND
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'foodgram'),
+    },
+}
+
+SHARED_CACHE_ALIAS = 'default'
+# Пересчёт промаха одним процессом: срок блокировки и ожидание остальных.
+SINGLE_FLIGHT_LOCK_TIMEOUT = 30
+SINGLE_FLIGHT_WAIT = float(os.getenv('SINGLE_FLIGHT_WAIT', 2))
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -130,6 +162,20 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+PROTECTED_MEDIA_URL = '/protected/media/'
+USE_X_ACCEL_REDIRECT = os.getenv('USE_X_ACCEL_REDIRECT', 'True') == 'True'
+
+DOCS_ROOT = Path(os.getenv('DOCS_ROOT', BASE_DIR.parent / 'docs'))
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'text/plain',
+    'text/csv',
+)
+PRECOMPRESS_EXTENSIONS = (
+    '.css', '.js', '.json', '.html', '.svg', '.txt', '.csv', '.yml', '.map',
+)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -142,16 +188,128 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Перед backend стоит один nginx, он перезаписывает X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+    'DEFAULT_THROTTLE_RATES': {
+        'user_create': '10/hour',
+        'user_create_ip': '20/hour',
+        'subscribe': '60/min',
+        'recipe_write': '10/min',
+        'recipe_write_ip': '30/min',
+        'favorite': '60/min',
+        'shopping_cart': '60/min',
+    },
 }
 
+THROTTLE_CACHE_ALIAS = os.getenv(
+    'THROTTLE_CACHE_ALIAS', SHARED_CACHE_ALIAS if SHARED_CACHE else None
+)
+THROTTLE_LOCAL_MAX_KEYS = 100000
+# Блокировка корзины в общем кеше: сколько её ждать и как часто пробовать.
+THROTTLE_LOCK_TIMEOUT = 1
+THROTTLE_LOCK_WAIT = 0.5
+THROTTLE_LOCK_POLL_INTERVAL = 0.005
+
+RECIPE_IMAGE_MAX_BYTES = int(os.getenv('RECIPE_IMAGE_MAX_BYTES', 5 * 1024 * 1024))
+DATA_UPLOAD_MAX_MEMORY_SIZE = RECIPE_IMAGE_MAX_BYTES * 4 // 3 + 1024 * 1024
+
+LOAD_SHEDDING_QUEUE_LATENCY = float(os.getenv('LOAD_SHEDDING_QUEUE_LATENCY', 0.5))
+LOAD_SHEDDING_EWMA_ALPHA = 0.2
+LOAD_SHEDDING_RETRY_AFTER = 5
+
 RECIPESR_ON_PAGE = 6
 TAG_MAX_LENGTH = 50
+TAG_MASK_BITS = 63
+TAG_CATALOG_TTL = 60
+# Кеш числа рецептов в списке; точный COUNT(*) — до порога, дальше оценка.
+RECIPE_COUNT_CACHE_ALIAS = os.getenv(
+    'RECIPE_COUNT_CACHE_ALIAS', SHARED_CACHE_ALIAS
+)
+RECIPE_COUNT_CACHE_TTL = int(os.getenv('RECIPE_COUNT_CACHE_TTL', 60))
+RECIPE_EXACT_COUNT_LIMIT = int(os.getenv('RECIPE_EXACT_COUNT_LIMIT', 10000))
+ADMIN_EXACT_COUNT_LIMIT = 100000
+RECIPE_IMAGE_MAX_SIDE = 1600
+# Через сколько секунд проверять, что файл изображения больше не нужен.
+IMAGE_RELEASE_DELAY = int(os.getenv('IMAGE_RELEASE_DELAY', 3600))
+
+# Автодополнение ингредиентов: сколько вернуть и сколько опечаток прощать.
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_SEARCH_MAX_LIMIT = 100
+INGREDIENT_SEARCH_MAX_TYPOS = 1
+INGREDIENT_FUZZY_MIN_LENGTH = 3
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+
+SIMILAR_RECIPES_TOP_K = 10
+# Сколько id рецептов и пользователей принимает /api/batch/.
+BATCH_MAX_IDS = 100
+SIMILARITY_TAG_WEIGHT = 0.3
+SIMILARITY_MAX_DF = 0.5
+
+# Задержки маршрутов и медленные запросы; снимки процессов пишутся в
+# TELEMETRY_DIR, пустое значение отключает запись.
+TELEMETRY_DIR = os.getenv('TELEMETRY_DIR', BASE_DIR / 'var' / 'telemetry')
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv('TELEMETRY_FLUSH_INTERVAL', 30))
+# Снимки других хостов старше этого считаются оставшимися от остановленных
+# процессов и удаляются при чтении.
+TELEMETRY_SNAPSHOT_MAX_AGE = 10 * TELEMETRY_FLUSH_INTERVAL
+TELEMETRY_SLO_MS = int(os.getenv('TELEMETRY_SLO_MS', 300))
+TELEMETRY_SLO_TARGETS = {
+    'GET api:recipes-list': 200,
+    'GET api:recipes-detail': 100,
+}
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+SLOW_QUERY_LOG_SIZE = 200
+
+ACTIVITY_FLUSH_SIZE = int(os.getenv('ACTIVITY_FLUSH_SIZE', 500))
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', 5))
+ACTIVITY_RETENTION_DAYS = int(os.getenv('ACTIVITY_RETENTION_DAYS', 90))
+
+LIVE_BACKEND = os.getenv('LIVE_BACKEND', 'live.backends.PostgresBackend')
+LIVE_EVENTS_PATH = '/api/events/'
+LIVE_QUEUE_SIZE = 100
+LIVE_KEEPALIVE = 15
+LIVE_RETRY = 3
+LIVE_RECONNECT_DELAY = 5
+# Срок действия билета на подключение и период повторной проверки токена
+# открытого потока, в секундах.
+LIVE_TICKET_TTL = 30
+LIVE_AUTH_RECHECK = 30
+
+# Мягко удалённые рецепты и пользователи: задержка и размер пачки очистки.
+PURGE_DELAY = int(os.getenv('PURGE_DELAY', 0))
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 1000))
+
+# Сколько секунд хранятся файлы списков покупок (команда prune_exports).
+EXPORT_FILE_TTL = int(os.getenv('EXPORT_FILE_TTL', 24 * 60 * 60))
+
+# Задача считается брошенной, если воркер не отмечался JOB_TIMEOUT
+# секунд; отметки идут раз в JOB_HEARTBEAT_INTERVAL секунд.
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 600))
+JOB_HEARTBEAT_INTERVAL = int(os.getenv('JOB_HEARTBEAT_INTERVAL', 30))
+# Выполненные и упавшие задачи хранятся столько секунд.
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', 7 * 24 * 60 * 60))
+JOB_SWEEP_INTERVAL = int(os.getenv('JOB_SWEEP_INTERVAL', 60 * 60))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', 10))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+JOB_WORKER_PROCESSES = int(os.getenv('JOB_WORKER_PROCESSES', 2))
 USER_MAX_LENGTH = 150
 
+# Кеш token → user. С общим кешем отзыв токена виден всем процессам сразу,
+# без него — через TOKEN_CACHE_TTL секунд.
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 300))
+TOKEN_CACHE_ALIAS = os.getenv(
+    'TOKEN_CACHE_ALIAS', SHARED_CACHE_ALIAS if SHARED_CACHE else None
+)
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USER': False,
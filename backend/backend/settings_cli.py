@@ -0,0 +1,29 @@
+"""
+Облегчённые настройки для management-команд и воркера фоновых задач.
+
+Админка, статика, djoser и django_filters нужны только процессам,
+обслуживающим HTTP, а их загрузка занимает заметную часть старта
+процесса (django_filters, например, импортирует coreapi и requests).
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS
+
+HTTP_ONLY_APPS = (
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'djoser',
+    'django_filters',
+)
+
+# Модель LogEntry ссылается на пользователей: без неё удаление
+# пользователя не каскадируется на django_admin_log и падает на внешнем
+# ключе. SimpleAdminConfig оставляет модель, но не импортирует admin.py
+# всех приложений.
+INSTALLED_APPS = [
+    'django.contrib.admin.apps.SimpleAdminConfig'
+    if app == 'django.contrib.admin' else app
+    for app in INSTALLED_APPS if app not in HTTP_ONLY_APPS
+]
+
+MIDDLEWARE = []
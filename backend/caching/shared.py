@@ -0,0 +1,88 @@
+"""
+Общий кеш, согласованный между репликами backend.
+
+Ключи версионируются: запись повышает версию, а не удаляет ключи, и все
+процессы сразу перестают видеть старые значения. Промах пересчитывает
+один процесс: он берёт блокировку через cache.add, остальные ждут
+значение до SINGLE_FLIGHT_WAIT секунд и только потом считают сами, так
+что сброс версии не превращается в лавину одинаковых запросов к БД.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+MISSING = object()
+
+
+def get_cache(alias=None):
+    return caches[alias or settings.SHARED_CACHE_ALIAS]
+
+
+def get_versions(keys, cache=None):
+    """Версии ключей; отсутствующая версия считается равной 1."""
+    cache = cache or get_cache()
+    versions = cache.get_many(keys)
+    return [versions.get(key, 1) for key in keys]
+
+
+def bump_version(key, cache=None):
+    cache = cache or get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+@contextmanager
+def cache_lock(key, timeout, wait, cache=None, poll=None):
+    """
+    Блокировка key на все процессы через cache.add. Внутри блока
+    отдаёт False, если за wait секунд взять её не удалось.
+    """
+    cache = cache or get_cache()
+    poll = poll or settings.SINGLE_FLIGHT_POLL_INTERVAL
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + wait
+    while not cache.add(lock_key, 1, timeout):
+        if time.monotonic() >= deadline:
+            yield False
+            return
+        time.sleep(poll)
+    try:
+        yield True
+    finally:
+        cache.delete(lock_key)
+
+
+def get_or_compute(key, compute, timeout, cache=None):
+    """
+    Значение из кеша или результат compute(), посчитанный один раз на
+    все процессы.
+    """
+    cache = cache or get_cache()
+    value = cache.get(key, MISSING)
+    if value is not MISSING:
+        return value
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+            value = cache.get(key, MISSING)
+            if value is not MISSING:
+                return value
+            # Держатель блокировки упал, не записав значение.
+            if cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+                break
+        else:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+    try:
+        value = compute()
+        cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
@@ -0,0 +1,25 @@
+import gc
+import os
+
+bind = '0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+# Приложение загружается в мастере до fork: воркеры стартуют без
+# повторного импорта Django и проекта и делят его страницы памяти.
+preload_app = True
+
+
+def when_ready(server):
+    """Прогрев в мастере: всё, что иначе загрузилось бы на первом запросе."""
+    from django.db import connections
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    get_resolver().url_patterns
+    api_settings.DEFAULT_RENDERER_CLASSES
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    # Соединения с БД не должны переходить в дочерние процессы.
+    connections.close_all()
+    # Объекты, созданные до fork, исключаются из сборки мусора: обход
+    # их заголовков при сборке копировал бы страницы в каждый воркер.
+    gc.collect()
+    gc.freeze()
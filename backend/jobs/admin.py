@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from recipes.admin_utils import ScalableAdmin, input_filter
+from .models import Job
+
+
+class JobAdmin(ScalableAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'attempts', 'user', 'created',
+    )
+    list_filter = ('status', input_filter('user', 'пользователю'))
+    search_fields = ('^name', )
+    list_select_related = ('user', )
+    raw_id_fields = ('user', )
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,92 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connections
+
+from jobs.queue import claim_job, heartbeat, prune_jobs, run_job_by_id
+
+
+def init_worker():
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "run background jobs from the database queue"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOB_WORKER_PROCESSES,
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить все готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        self.last_heartbeat = self.last_sweep = float('-inf')
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processes = options['processes']
+        connections.close_all()
+        with ProcessPoolExecutor(processes, initializer=init_worker) as pool:
+            # Будущий результат -> id задачи.
+            futures = {}
+            while self.running:
+                self.maintain(futures)
+                if len(futures) >= processes:
+                    futures = self.wait(futures)
+                    continue
+                job = claim_job()
+                if job is not None:
+                    # Пул может породить процесс при submit: дочерний не
+                    # должен унаследовать и закрыть соединение воркера.
+                    connections.close_all()
+                    futures[pool.submit(run_job_by_id, job.pk)] = job.pk
+                    continue
+                if options['once']:
+                    if not futures:
+                        break
+                    futures = self.wait(futures)
+                    continue
+                time.sleep(options['poll_interval'])
+            while futures:
+                self.maintain(futures)
+                futures = self.wait(futures)
+        self.stdout.write(self.style.SUCCESS('Воркер остановлен'))
+
+    def wait(self, futures):
+        done, _ = wait(
+            futures, timeout=settings.JOB_HEARTBEAT_INTERVAL,
+            return_when=FIRST_COMPLETED,
+        )
+        for future in done:
+            if future.exception() is not None:
+                self.stderr.write(f'Ошибка воркера: {future.exception()}')
+        return {
+            future: job_id for future, job_id in futures.items()
+            if future not in done
+        }
+
+    def maintain(self, futures):
+        """
+        Отмечает задачи, выполняемые процессами пула, и раз в
+        JOB_SWEEP_INTERVAL удаляет старые выполненные и упавшие задачи.
+        """
+        now = time.monotonic()
+        if now - self.last_heartbeat >= settings.JOB_HEARTBEAT_INTERVAL:
+            heartbeat(list(futures.values()))
+            self.last_heartbeat = now
+        if now - self.last_sweep >= settings.JOB_SWEEP_INTERVAL:
+            prune_jobs(settings.JOB_RETENTION)
+            self.last_sweep = now
+
+    def stop(self, signum, frame):
+        self.running = False
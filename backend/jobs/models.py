@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+CustomUser = get_user_model()
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=100,
+    )
+    payload = models.JSONField(
+        default=dict,
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+    )
+    started = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+    heartbeat = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+    result = models.JSONField(
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        blank=True,
+    )
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs',
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('-created', )
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_after'],
+                name='job_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
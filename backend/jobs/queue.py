@@ -0,0 +1,115 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name, payload=None, user=None, priority=None, delay=0):
+    """Ставит зарегистрированную задачу name в очередь."""
+    task = get_task(name)
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        priority=task.priority if priority is None else priority,
+        max_attempts=task.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    return job
+
+
+def claim_job():
+    """
+    Забирает одну готовую к выполнению задачу.
+
+    SELECT ... FOR UPDATE SKIP LOCKED позволяет нескольким воркерам
+    разбирать очередь без взаимных блокировок. Задачи в статусе running,
+    за которые воркер не отмечался дольше JOB_TIMEOUT, считаются
+    брошенными и забираются снова, пока не исчерпан max_attempts; иначе
+    они помечаются failed.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_TIMEOUT)
+    Job.objects.filter(
+        status=Job.RUNNING, heartbeat__lt=stale,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Job.FAILED, updated=now,
+        error=f'Не завершилась за {settings.JOB_TIMEOUT} с',
+    )
+    with transaction.atomic():
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Job.QUEUED, run_after__lte=now)
+                | Q(
+                    status=Job.RUNNING, heartbeat__lt=stale,
+                    attempts__lt=F('max_attempts'),
+                )
+            )
+            .order_by('-priority', 'run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.started = job.heartbeat = now
+        job.attempts += 1
+        job.save(update_fields=(
+            'status', 'started', 'heartbeat', 'attempts', 'updated'
+        ))
+    return job
+
+
+def heartbeat(job_ids):
+    """Отмечает, что задачи job_ids ещё выполняются."""
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids, status=Job.RUNNING).update(
+            heartbeat=timezone.now()
+        )
+
+
+def prune_jobs(retention):
+    """Удаляет выполненные и упавшие задачи старше retention секунд."""
+    border = timezone.now() - timedelta(seconds=retention)
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED), updated__lt=border
+    ).delete()
+    return deleted
+
+
+def run_job(job):
+    try:
+        result = get_task(job.name).func(**job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        logger.exception('Задача %s завершилась с ошибкой', job)
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.DONE
+        job.result = result
+        job.error = ''
+    job.save(update_fields=(
+        'status', 'run_after', 'result', 'error', 'updated'
+    ))
+    return job
+
+
+def run_job_by_id(job_id):
+    return run_job(Job.objects.get(pk=job_id)).status
@@ -0,0 +1,22 @@
+from collections import namedtuple
+
+Task = namedtuple('Task', ('name', 'func', 'priority', 'max_attempts'))
+
+tasks = {}
+
+
+def task(name, priority=0, max_attempts=3):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+
+    def decorator(func):
+        tasks[name] = Task(name, func, priority, max_attempts)
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    try:
+        return tasks[name]
+    except KeyError:
+        raise LookupError(f'Задача {name} не зарегистрирована')
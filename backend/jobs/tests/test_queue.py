@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim_job, heartbeat, prune_jobs
+
+
+class ClaimStaleJobTests(TestCase):
+
+    def create_running(self, attempts, seconds_ago=settings.JOB_TIMEOUT + 1):
+        started = timezone.now() - timedelta(seconds=seconds_ago)
+        return Job.objects.create(
+            name='test', status=Job.RUNNING, started=started,
+            heartbeat=started, attempts=attempts, max_attempts=3,
+        )
+
+    def test_stale_job_with_attempts_left_is_reclaimed(self):
+        job = self.create_running(attempts=2)
+        claimed = claim_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 3)
+
+    def test_exhausted_stale_job_fails(self):
+        job = self.create_running(attempts=3)
+        self.assertIsNone(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertTrue(job.error)
+
+    def test_long_job_with_heartbeat_is_not_reclaimed(self):
+        job = self.create_running(
+            attempts=1, seconds_ago=settings.JOB_TIMEOUT * 3
+        )
+        heartbeat([job.pk])
+        self.assertIsNone(claim_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 1))
+
+
+class PruneJobsTests(TestCase):
+
+    def test_old_finished_jobs_are_deleted(self):
+        jobs = {
+            status: Job.objects.create(name='test', status=status)
+            for status in (Job.QUEUED, Job.RUNNING, Job.DONE, Job.FAILED)
+        }
+        fresh = Job.objects.create(name='test', status=Job.DONE)
+        Job.objects.exclude(pk=fresh.pk).update(
+            updated=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(prune_jobs(24 * 60 * 60), 2)
+        self.assertEqual(
+            set(Job.objects.values_list('pk', flat=True)),
+            {jobs[Job.QUEUED].pk, jobs[Job.RUNNING].pk, fresh.pk},
+        )
@@ -0,0 +1,92 @@
+import json
+import logging
+import select
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseBackend:
+    """Доставляет опубликованные события в Hub процессов с потоками."""
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def start(self, hub):
+        pass
+
+
+class LocalBackend(BaseBackend):
+    """Замена для разработки: издатель и потоки в одном процессе."""
+
+    def start(self, hub):
+        self.hub = hub
+
+    def publish(self, channel, message):
+        hub = getattr(self, 'hub', None)
+        if hub is not None:
+            hub.dispatch_threadsafe(channel, message)
+
+
+class PostgresBackend(BaseBackend):
+    """
+    События через LISTEN/NOTIFY.
+
+    Любой процесс публикует через pg_notify в своём соединении; процесс
+    с потоками держит одно отдельное соединение с LISTEN в фоновом
+    потоке и раздаёт уведомления через Hub.
+    """
+
+    pg_channel = 'live_events'
+
+    def publish(self, channel, message):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)',
+                [self.pg_channel, json.dumps([channel, message])]
+            )
+
+    def start(self, hub):
+        thread = threading.Thread(
+            target=self.listen, args=(hub, ), daemon=True,
+            name='live-listener'
+        )
+        thread.start()
+
+    def listen(self, hub):
+        while True:
+            try:
+                self.listen_once(hub)
+            except Exception:
+                logger.exception('LISTEN connection failed')
+                time.sleep(settings.LIVE_RECONNECT_DELAY)
+
+    def listen_once(self, hub):
+        listener = connections.create_connection('default')
+        try:
+            listener.ensure_connection()
+            raw = listener.connection
+            raw.autocommit = True
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.pg_channel}')
+            while True:
+                if not select.select([raw], [], [], 60)[0]:
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    notify = raw.notifies.pop(0)
+                    channel, message = json.loads(notify.payload)
+                    hub.dispatch_threadsafe(channel, message)
+        finally:
+            listener.close()
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.LIVE_BACKEND)()
@@ -0,0 +1,17 @@
+from django.db import transaction
+
+from .backends import get_backend
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+def publish(channel, event, data):
+    """Публикует событие после фиксации текущей транзакции."""
+    message = {'event': event, 'data': data}
+    transaction.on_commit(lambda: get_backend().publish(channel, message))
@@ -0,0 +1,71 @@
+import asyncio
+from collections import defaultdict
+
+from django.conf import settings
+
+
+class Subscription:
+    """Очередь событий одного подключения и его набор каналов."""
+
+    def __init__(self, channels, queue_size):
+        self.channels = set(channels)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+
+class Hub:
+    """
+    Раздача событий подключениям внутри процесса.
+
+    Каждое событие из бэкенда приходит в процесс один раз и
+    раскладывается по очередям подписчиков канала. Очереди ограничены:
+    медленный клиент теряет события, но не задерживает остальных.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._channels = defaultdict(set)
+        self.loop = None
+
+    def start(self, loop, backend):
+        if self.loop is None:
+            self.loop = loop
+            backend.start(self)
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, self.queue_size)
+        for channel in subscription.channels:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def update(self, subscription, add=(), remove=()):
+        for channel in remove:
+            subscription.channels.discard(channel)
+            self._discard(channel, subscription)
+        for channel in add:
+            subscription.channels.add(channel)
+            self._channels[channel].add(subscription)
+
+    def unsubscribe(self, subscription):
+        for channel in subscription.channels:
+            self._discard(channel, subscription)
+
+    def _discard(self, channel, subscription):
+        subscribers = self._channels.get(channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[channel]
+
+    def dispatch(self, channel, message):
+        for subscription in tuple(self._channels.get(channel, ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+
+    def dispatch_threadsafe(self, channel, message):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.dispatch, channel, message)
+
+
+hub = Hub(settings.LIVE_QUEUE_SIZE)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+from functools import wraps
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication
+from users.models import Subscription
+from .backends import get_backend
+from .events import author_channel, user_channel
+from .hub import hub
+from .tickets import redeem_ticket
+
+
+def get_header_token(scope):
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            keyword, _, key = value.decode('latin-1').partition(' ')
+            if keyword == CachedTokenAuthentication.keyword and key:
+                return key.strip()
+    return None
+
+
+def database_sync_to_async(func):
+    """
+    sync_to_async для работы с БД вне цикла запроса Django.
+
+    Поток живёт часами, и сигналы request_started/request_finished,
+    которые закрывают устаревшие соединения, для него не срабатывают.
+    Поэтому соединения проверяются до и после каждого обращения.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
+
+
+@database_sync_to_async
+def get_token(scope):
+    """
+    Токен из заголовка Authorization или по билету из ?ticket= для
+    EventSource, который не умеет передавать заголовки.
+    """
+    key = get_header_token(scope)
+    if key is not None:
+        return key
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    ticket = query.get('ticket', [None])[0]
+    return redeem_ticket(ticket) if ticket else None
+
+
+@database_sync_to_async
+def authenticate(key):
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+@database_sync_to_async
+def get_followed_authors(user_id):
+    return list(Subscription.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True))
+
+
+def format_event(message):
+    data = json.dumps(message['data'], ensure_ascii=False)
+    return f'event: {message["event"]}\ndata: {data}\n\n'.encode()
+
+
+class EventStream:
+    """
+    ASGI-приложение потока server-sent events текущего пользователя.
+
+    Канал пользователя несёт изменения его корзины, избранного и
+    подписок; каналы авторов — их новые рецепты. Набор каналов авторов
+    обновляется по событиям подписки без обращения к БД. Токен
+    проверяется заново раз в LIVE_AUTH_RECHECK секунд, и после выхода
+    пользователя поток закрывается.
+    """
+
+    async def __call__(self, scope, receive, send):
+        key = await get_token(scope)
+        user = await authenticate(key) if key else None
+        if user is None:
+            await self.reject(send)
+            return
+        hub.start(asyncio.get_running_loop(), get_backend())
+        channels = {user_channel(user.id)} | {
+            author_channel(author_id)
+            for author_id in await get_followed_authors(user.id)
+        }
+        subscription = hub.subscribe(channels)
+        disconnect = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await self.send_chunk(
+                send, f'retry: {settings.LIVE_RETRY * 1000}\n\n'.encode()
+            )
+            await self.stream(send, subscription, disconnect, key)
+        finally:
+            hub.unsubscribe(subscription)
+            disconnect.cancel()
+
+    async def stream(self, send, subscription, disconnect, key):
+        checked = time.monotonic()
+        while True:
+            if time.monotonic() - checked >= settings.LIVE_AUTH_RECHECK:
+                if await authenticate(key) is None:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+                checked = time.monotonic()
+            message = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnect},
+                timeout=settings.LIVE_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnect in done:
+                message.cancel()
+                return
+            if message not in done:
+                message.cancel()
+                await self.send_chunk(send, b': keepalive\n\n')
+                continue
+            message = message.result()
+            if message['event'] == 'subscription':
+                self.follow(subscription, message['data'])
+            await self.send_chunk(send, format_event(message))
+
+    def follow(self, subscription, data):
+        channel = author_channel(data['target'])
+        if data['delta'] > 0:
+            hub.update(subscription, add=[channel])
+        else:
+            hub.update(subscription, remove=[channel])
+
+    async def wait_disconnect(self, receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    async def send_chunk(self, send, body):
+        await send({
+            'type': 'http.response.body', 'body': body, 'more_body': True,
+        })
+
+    async def reject(self, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 401,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'{"detail": "Authentication credentials were not '
+                    b'provided."}',
+        })
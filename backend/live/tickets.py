@@ -0,0 +1,43 @@
+"""
+Билеты для подключения к потоку событий.
+
+EventSource не передаёт заголовки, а токен в адресе попал бы в журналы
+nginx. Поэтому клиент получает короткоживущий подписанный билет через
+POST /api/events/tickets/ и передаёт его в ?ticket=. Билет несёт id
+пользователя и отпечаток токена, но не сам токен, и после выхода
+пользователя становится недействительным вместе с токеном.
+"""
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.authtoken.models import Token
+
+SALT = 'live.ticket'
+
+
+def token_digest(key):
+    return salted_hmac(SALT, key).hexdigest()
+
+
+def issue_ticket(user_id, key):
+    return signing.dumps(
+        {'user': user_id, 'token': token_digest(key)}, salt=SALT
+    )
+
+
+def redeem_ticket(ticket):
+    """Ключ токена, для которого выдан билет, или None."""
+    try:
+        data = signing.loads(
+            ticket, salt=SALT, max_age=settings.LIVE_TICKET_TTL
+        )
+    except signing.BadSignature:
+        return None
+    key = Token.objects.filter(
+        user_id=data['user']
+    ).values_list('key', flat=True).first()
+    if key is None or not constant_time_compare(
+        token_digest(key), data['token']
+    ):
+        return None
+    return key
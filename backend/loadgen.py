@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""
+Генератор нагрузки на API.
+
+Воспроизводит смесь запросов к эндпоинтам api/urls.py из нескольких
+потоков и печатает пропускную способность и гистограммы задержек.
+Использует только стандартную библиотеку и работает с локальным стендом
+без доступа в интернет. Пользователи для входа — из seed_dataset:
+
+    python manage.py seed_dataset --users 1000 --recipes 10000
+    python loadgen.py --base-url http://localhost:8000 --duration 60
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_MIX = (
+    'recipes_list=30,recipes_by_tag=15,recipe_detail=20,tags=5,'
+    'ingredients_search=10,users_me=5,subscriptions=3,favorites=4,'
+    'shopping_cart_list=2,favorite_toggle=3,cart_toggle=2,'
+    'download_shopping_cart=1'
+)
+SCENARIOS = {item.split('=')[0] for item in DEFAULT_MIX.split(',')}
+ANONYMOUS_SCENARIOS = {
+    'recipes_list', 'recipes_by_tag', 'recipe_detail', 'tags',
+    'ingredients_search',
+}
+# Границы корзин гистограммы, мс.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Client:
+    """Keep-alive соединение одного потока."""
+
+    def __init__(self, base_url, token=None, timeout=30):
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.token = token
+
+    def request(self, method, path, body=None):
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(
+                method, self.prefix + path, body=body, headers=headers
+            )
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            raise
+        return response.status, data
+
+
+class Scenarios:
+    """Запросы смеси; каждый возвращает HTTP-статус."""
+
+    def __init__(self, catalog, rng):
+        self.catalog = catalog
+        self.rng = rng
+
+    def get(self, client, path, **params):
+        if params:
+            path = f'{path}?{urlencode(params, doseq=True)}'
+        return client.request('GET', path)[0]
+
+    def recipe_id(self):
+        return self.rng.choice(self.catalog['recipes'])
+
+    def recipes_list(self, client):
+        return self.get(
+            client, '/api/recipes/', page=self.rng.randint(1, 20), limit=6
+        )
+
+    def recipes_by_tag(self, client):
+        tags = self.rng.sample(
+            self.catalog['tags'], min(2, len(self.catalog['tags']))
+        )
+        return self.get(client, '/api/recipes/', tags=tags, limit=6)
+
+    def recipe_detail(self, client):
+        return self.get(client, f'/api/recipes/{self.recipe_id()}/')
+
+    def tags(self, client):
+        return self.get(client, '/api/tags/')
+
+    def ingredients_search(self, client):
+        return self.get(
+            client, '/api/ingredients/',
+            name=self.rng.choice(self.catalog['prefixes'])
+        )
+
+    def users_me(self, client):
+        return self.get(client, '/api/users/me/')
+
+    def subscriptions(self, client):
+        return self.get(client, '/api/users/subscriptions/', limit=6)
+
+    def favorites(self, client):
+        return self.get(client, '/api/recipes/', is_favorited=1, limit=6)
+
+    def shopping_cart_list(self, client):
+        return self.get(
+            client, '/api/recipes/', is_in_shopping_cart=1, limit=6
+        )
+
+    def toggle(self, client, action):
+        path = f'/api/recipes/{self.recipe_id()}/{action}/'
+        status, _ = client.request('POST', path)
+        if status == 201:
+            status, _ = client.request('DELETE', path)
+        return status
+
+    def favorite_toggle(self, client):
+        return self.toggle(client, 'favorite')
+
+    def cart_toggle(self, client):
+        return self.toggle(client, 'shopping_cart')
+
+    def download_shopping_cart(self, client):
+        return self.get(client, '/api/recipes/download_shopping_cart/')
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f'Неизвестный сценарий: {name}')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def login(base_url, email, password):
+    status, data = Client(base_url).request(
+        'POST', '/api/auth/token/login/',
+        {'email': email, 'password': password}
+    )
+    if status != 200:
+        return None
+    return json.loads(data)['auth_token']
+
+
+def load_catalog(base_url, pages):
+    client = Client(base_url)
+    recipes = []
+    for page in range(1, pages + 1):
+        status, data = client.request(
+            'GET', f'/api/recipes/?page={page}&limit=50'
+        )
+        if status != 200:
+            break
+        results = json.loads(data)['results']
+        recipes.extend(recipe['id'] for recipe in results)
+        if len(results) < 50:
+            break
+    _, data = client.request('GET', '/api/tags/')
+    tags = [tag['slug'] for tag in json.loads(data)]
+    _, data = client.request('GET', '/api/ingredients/')
+    prefixes = sorted({
+        ingredient['name'][:2] for ingredient in json.loads(data)
+    }) or ['а']
+    if not recipes:
+        raise SystemExit('Нет рецептов: сначала выполните seed_dataset.')
+    return {'recipes': recipes, 'tags': tags, 'prefixes': prefixes}
+
+
+class Stats:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+
+    def add(self, name, latency, status):
+        with self.lock:
+            self.latencies[name].append(latency)
+            self.statuses[name][status] += 1
+            if status is None or status >= 500:
+                self.errors[name] += 1
+
+
+def worker(base_url, token, catalog, weights, deadline, stats, seed):
+    rng = random.Random(seed)
+    scenarios = Scenarios(catalog, rng)
+    client = Client(base_url, token)
+    names = list(weights)
+    values = list(weights.values())
+    while time.monotonic() < deadline:
+        name = rng.choices(names, values)[0]
+        started = time.perf_counter()
+        try:
+            status = getattr(scenarios, name)(client)
+        except (OSError, http.client.HTTPException):
+            status = None
+            client = Client(base_url, token)
+        stats.add(name, (time.perf_counter() - started) * 1000, status)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in values:
+        index = next(
+            (i for i, bound in enumerate(BUCKETS) if value <= bound),
+            len(BUCKETS)
+        )
+        counts[index] += 1
+    width = max(counts) or 1
+    lines = []
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        label = (
+            f'<= {BUCKETS[index]} мс' if index < len(BUCKETS)
+            else f'> {BUCKETS[-1]} мс'
+        )
+        lines.append(f'  {label:>12} {count:>8} {"#" * (40 * count // width)}')
+    return lines
+
+
+def report(stats, elapsed):
+    total = sum(len(values) for values in stats.latencies.values())
+    print(f'\nЗапросов: {total}, {total / elapsed:.1f} в секунду\n')
+    print(
+        f'{"scenario":<24}{"count":>8}{"rps":>8}{"errors":>8}'
+        f'{"p50":>8}{"p90":>8}{"p99":>8}{"max":>8}'
+    )
+    for name, values in sorted(stats.latencies.items()):
+        print(
+            f'{name:<24}{len(values):>8}{len(values) / elapsed:>8.1f}'
+            f'{stats.errors[name]:>8}'
+            f'{statistics.median(values):>8.1f}'
+            f'{percentile(values, 90):>8.1f}'
+            f'{percentile(values, 99):>8.1f}{max(values):>8.1f}'
+        )
+    for name, values in sorted(stats.latencies.items()):
+        statuses = ', '.join(
+            f'{status}: {count}'
+            for status, count in sorted(
+                stats.statuses[name].items(), key=lambda item: str(item[0])
+            )
+        )
+        print(f'\n{name} ({statuses})')
+        print('\n'.join(histogram(values)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument(
+        '--mix', default=DEFAULT_MIX,
+        help='Сценарии и веса: name=weight,...',
+    )
+    parser.add_argument(
+        '--users', type=int, default=8,
+        help='Сколько пользователей seed_dataset использовать; 0 — анонимно.',
+    )
+    parser.add_argument('--prefix', default='seed')
+    parser.add_argument('--password', default='seed-password')
+    parser.add_argument('--catalog-pages', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    catalog = load_catalog(args.base_url, args.catalog_pages)
+    tokens = [
+        login(args.base_url, f'{args.prefix}_{number}@example.com',
+              args.password)
+        for number in range(args.users)
+    ]
+    tokens = [token for token in tokens if token] or [None]
+    if tokens == [None]:
+        for name in list(weights):
+            if name not in ANONYMOUS_SCENARIOS:
+                del weights[name]
+    print(
+        f'{args.concurrency} потоков, {args.duration:.0f} с, '
+        f'пользователей: {len([t for t in tokens if t])}, '
+        f'рецептов в выборке: {len(catalog["recipes"])}'
+    )
+    stats = Stats()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(
+            args.base_url, tokens[number % len(tokens)], catalog, weights,
+            deadline, stats, args.seed + number,
+        ))
+        for number in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report(stats, time.monotonic() - started)
+
+
+if __name__ == '__main__':
+    main()
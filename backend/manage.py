@@ -3,9 +3,31 @@
 import os
 import sys
 
+# Команды, которым не нужны HTTP-приложения: они запускаются с
+# облегчёнными настройками, если DJANGO_SETTINGS_MODULE не задан явно.
+CLI_COMMANDS = {
+    'build_similar_recipes',
+    'compact_activity',
+    'dedupe_images',
+    'export_corpus',
+    'import_corpus',
+    'load_ingredients',
+    'precompress',
+    'profile_startup',
+    'purge_deleted',
+    'rebuild_recipe_documents',
+    'runworker',
+    'seed_dataset',
+    'telemetry_report',
+}
+
 
 def main():
     """Run administrative tasks."""
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        os.environ.setdefault(
+            'DJANGO_SETTINGS_MODULE', 'backend.settings_cli'
+        )
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
     try:
         from django.core.management import execute_from_command_line
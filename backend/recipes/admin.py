@@ -1,21 +1,53 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
 
+from api.deletion import restore_recipes
+from .admin_utils import ScalableAdmin, SoftDeleteAdmin, input_filter
 from .models import (
     Favorite, Ingredient, Recipe, ShoppingCart, Tag
 )
 
 
-class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'measurement_unit')
-    search_fields = ('name',)
+class IngredientAdmin(ScalableAdmin):
+    list_display = (
+        'id', 'name', 'measurement_unit', 'kcal', 'protein', 'price'
+    )
+    search_fields = ('^name',)
 
 
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'author', 'text', 'is_favorited')
-    list_filter = ('author', 'name', 'tags')
+class RecipeAdmin(SoftDeleteAdmin):
+    list_display = (
+        'id', 'name', 'author', 'text', 'is_favorited', 'deleted'
+    )
+    list_filter = (input_filter('author', 'автору'), 'tags')
+    list_select_related = ('author', )
+    search_fields = ('^name',)
+    autocomplete_fields = ('author', )
+    actions = ('restore', )
 
+    def get_queryset(self, request):
+        favorites_count = (
+            Favorite.objects
+            .filter(recipe=OuterRef('pk'))
+            .order_by()
+            .values('recipe')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        return super().get_queryset(request).annotate(
+            favorites_count=Subquery(
+                favorites_count, output_field=IntegerField()
+            )
+        )
+
+    @admin.display(description='В избранном', ordering='favorites_count')
     def is_favorited(self, obj):
-        return obj.is_favorited.count()
+        return obj.favorites_count or 0
+
+    @admin.action(description='Восстановить удалённые рецепты')
+    def restore(self, request, queryset):
+        restored = restore_recipes(list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, f'Восстановлено рецептов: {restored}')
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -23,16 +55,26 @@ class TagAdmin(admin.ModelAdmin):
     search_fields = ('name', 'color')
 
 
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(ScalableAdmin):
     list_display = ('pk', 'user', 'recipe')
-    list_filter = ('user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_filter = (
+        input_filter('user', 'пользователю'),
+        input_filter('recipe', 'рецепту'),
+    )
+    list_select_related = ('user', 'recipe')
+    search_fields = ('^user__username', '^recipe__name')
+    autocomplete_fields = ('user', 'recipe')
 
 
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(ScalableAdmin):
     list_display = ('pk', 'user', 'recipe')
-    list_filter = ('user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_filter = (
+        input_filter('user', 'пользователю'),
+        input_filter('recipe', 'рецепту'),
+    )
+    list_select_related = ('user', 'recipe')
+    search_fields = ('^user__username', '^recipe__name')
+    autocomplete_fields = ('user', 'recipe')
 
 
 admin.site.register(Tag, TagAdmin)
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Фильтр по id связанного объекта с полем ввода вместо списка.
+
+    В отличие от фильтра по ForeignKey не перечисляет все объекты
+    связанной таблицы.
+    """
+
+    template = 'admin/input_filter.html'
+    lookup = None
+    placeholder = 'id'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            return queryset.filter(**{self.lookup: int(value)})
+        except ValueError:
+            return queryset.none()
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+            'query_parts': [
+                (key, value) for key, value in changelist.params.items()
+                if key not in (self.parameter_name, PAGE_VAR)
+            ],
+            'parameter_name': self.parameter_name,
+            'placeholder': self.placeholder,
+            'value': self.value(),
+        }
+
+
+def input_filter(field, title):
+    return type(f'{field.title()}InputFilter', (InputFilter, ), {
+        'title': title,
+        'parameter_name': f'{field}_id',
+        'lookup': f'{field}_id',
+    })
+
+
+class DeletedFilter(admin.SimpleListFilter):
+    title = 'удалению'
+    parameter_name = 'deleted'
+
+    def lookups(self, request, model_admin):
+        return (('no', 'Действующие'), ('yes', 'Удалённые'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'no':
+            return queryset.filter(deleted__isnull=True)
+        if self.value() == 'yes':
+            return queryset.filter(deleted__isnull=False)
+        return queryset
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Для нефильтрованных больших таблиц в PostgreSQL берёт оценку числа
+    строк из pg_class вместо COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        estimate = self.get_estimate()
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        if estimate is not None and estimate > limit:
+            return estimate
+        return super().count
+
+    def get_estimate(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [self.object_list.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SoftDeleteAdmin(ScalableAdmin):
+    """
+    Админка моделей с мягким удалением: список строится по all_objects,
+    чтобы удалённые строки можно было найти до очистки, а условие
+    deleted IS NULL не мешало оценке числа строк.
+    """
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_list_filter(self, request):
+        return (DeletedFilter, *super().get_list_filter(request))
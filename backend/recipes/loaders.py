@@ -0,0 +1,73 @@
+import csv
+
+from django.conf import settings
+
+from .models import Ingredient
+from .search import invalidate_ingredient_index
+
+BATCH_SIZE = 1000
+NUTRITION_FIELDS = ('kcal', 'protein', 'price')
+
+
+def parse_nutrition(values):
+    """
+    Заполненные необязательные столбцы kcal, protein, price (на единицу
+    измерения); пустые и отсутствующие в словарь не попадают.
+    """
+    return {
+        field: float(value)
+        for field, value in zip(NUTRITION_FIELDS, values) if value.strip()
+    }
+
+
+def load_ingredients(path=None):
+    """
+    Добавляет недостающие ингредиенты из csv пачками bulk_create.
+
+    Строка: name, measurement_unit[, kcal, protein, price]. У уже
+    существующих ингредиентов обновляются только заполненные в строке
+    столбцы: обновления группируются по набору полей, и каждая группа
+    записывается своим bulk_update.
+    """
+    path = path or f'{settings.BASE_DIR}/recipes/data/ingredients.csv'
+    existing = {
+        (name, measurement_unit): pk
+        for pk, name, measurement_unit in Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'
+        )
+    }
+    created = 0
+    batch = []
+    updates = {}
+    with open(path, 'r', encoding='utf-8') as file:
+        file_reader = csv.reader(file)
+        next(file_reader)
+
+        for row in file_reader:
+            name, measurement_unit, *extra = row
+            nutrition = parse_nutrition(extra)
+            key = (name, measurement_unit)
+            if key in existing:
+                if nutrition and existing[key] is not None:
+                    updates.setdefault(tuple(sorted(nutrition)), []).append(
+                        Ingredient(pk=existing[key], **nutrition)
+                    )
+                continue
+            existing[key] = None
+            batch.append(Ingredient(
+                name=name,
+                measurement_unit=measurement_unit,
+                **nutrition,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                created += len(Ingredient.objects.bulk_create(batch))
+                batch = []
+    if batch:
+        created += len(Ingredient.objects.bulk_create(batch))
+    for fields, objects in updates.items():
+        Ingredient.objects.bulk_update(
+            objects, fields, batch_size=BATCH_SIZE
+        )
+    if created:
+        invalidate_ingredient_index()
+    return created
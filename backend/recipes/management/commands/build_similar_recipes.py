@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from recipes.models import Recipe, SimilarRecipe
+from recipes.similarity import SimilarityModel
+
+
+class Command(BaseCommand):
+    help = "precompute top-K similar recipes"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все рецепты, а не только изменённые.',
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=settings.SIMILAR_RECIPES_TOP_K,
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        last_run = SimilarRecipe.objects.aggregate(
+            last_run=Max('computed')
+        )['last_run']
+        model = SimilarityModel()
+        if options['full'] or last_run is None:
+            targets = set(map(int, model.recipe_ids))
+            self.store(model, targets, options, started)
+        else:
+            # Удалённые рецепты тоже в списке: их собственные списки
+            # очищаются, а списки, где они встречаются, пересчитываются.
+            targets = set(Recipe.all_objects.filter(
+                Q(updated__gt=last_run) | Q(deleted__gt=last_run)
+            ).values_list('id', flat=True))
+            neighbors = self.store(model, targets, options, started)
+            affected = self.get_affected(
+                targets, neighbors, options['top_k']
+            )
+            self.store(model, affected - targets, options, started)
+            targets |= affected
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны: {len(targets)}'
+        ))
+
+    def store(self, model, targets, options, computed):
+        targets = sorted(targets)
+        neighbors = {}
+        for start in range(0, len(targets), options['batch_size']):
+            batch = targets[start:start + options['batch_size']]
+            rows = []
+            for recipe_id in batch:
+                neighbors[recipe_id] = model.neighbors(
+                    recipe_id, options['top_k']
+                )
+                rows.extend(
+                    SimilarRecipe(
+                        recipe_id=recipe_id, similar_id=similar_id,
+                        score=score, computed=computed,
+                    )
+                    for similar_id, score in neighbors[recipe_id]
+                )
+            with transaction.atomic():
+                SimilarRecipe.objects.filter(recipe_id__in=batch).delete()
+                SimilarRecipe.objects.bulk_create(rows)
+        return neighbors
+
+    def get_affected(self, changed, neighbors, top_k):
+        """
+        Рецепты, чьи списки могли измениться вместе с изменёнными.
+
+        Близость симметрична: если изменённый рецепт ближе к соседу, чем
+        худший элемент его текущего списка, список соседа пересчитывается.
+        Пересчитываются и списки, где изменённый рецепт уже есть: его
+        близость могла упасть, или он удалён.
+        """
+        holders = set(SimilarRecipe.objects.filter(
+            similar_id__in=changed
+        ).values_list('recipe_id', flat=True))
+        candidates = {}
+        for items in neighbors.values():
+            for similar_id, score in items:
+                candidates[similar_id] = max(
+                    score, candidates.get(similar_id, 0)
+                )
+        if not candidates:
+            return holders
+        thresholds = {
+            recipe_id: min_score if size >= top_k else 0
+            for recipe_id, min_score, size in (
+                SimilarRecipe.objects.filter(recipe_id__in=candidates)
+                .values('recipe_id')
+                .annotate(min_score=Min('score'), size=Count('id'))
+                .values_list('recipe_id', 'min_score', 'size')
+            )
+        }
+        return holders | {
+            recipe_id for recipe_id, score in candidates.items()
+            if score > thresholds.get(recipe_id, 0)
+        }
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management import BaseCommand
+
+from recipes.corpus import export_corpus
+
+
+class Command(BaseCommand):
+    help = "stream recipes, links and images into a tar archive"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл архива или - для stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument(
+            '--no-images', action='store_true',
+            help='Не включать файлы изображений.',
+        )
+        parser.add_argument(
+            '--no-compress', action='store_true',
+            help='Писать tar без gzip.',
+        )
+
+    def handle(self, *args, **options):
+        arguments = {
+            'chunk_size': options['chunk_size'],
+            'images': not options['no_images'],
+            'compress': not options['no_compress'],
+        }
+        if options['path'] == '-':
+            counts = export_corpus(sys.stdout.buffer, **arguments)
+            sys.stdout.buffer.flush()
+            output = self.stderr
+        else:
+            with open(options['path'], 'wb') as file:
+                counts = export_corpus(file, **arguments)
+            output = self.stdout
+        output.write(self.style.SUCCESS(
+            'Экспортировано: ' + ', '.join(
+                f'{table} {count}' for table, count in counts.items()
+            )
+        ))
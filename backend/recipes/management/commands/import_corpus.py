@@ -0,0 +1,37 @@
+import sys
+import tarfile
+
+from django.core.management import BaseCommand, CommandError
+
+from recipes.corpus import CorpusImporter
+
+
+class Command(BaseCommand):
+    help = "import a corpus archive made by export_corpus"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл архива или - для stdin.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        importer = CorpusImporter(options['batch_size'])
+        try:
+            if options['path'] == '-':
+                counts = importer.run(sys.stdin.buffer)
+            else:
+                with open(options['path'], 'rb') as file:
+                    counts = importer.run(file)
+        except (ValueError, tarfile.TarError) as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            'Импортировано: ' + ', '.join(
+                f'{table} {count}' for table, count in counts.items()
+            )
+        ))
+        self.stdout.write(
+            'Документы рецептов построятся при первом чтении; чтобы '
+            'построить их заранее, выполните rebuild_recipe_documents.'
+        )
@@ -1,24 +1,30 @@
-import csv
-
-from django.conf import settings
 from django.core.management import BaseCommand
-from recipes.models import Ingredient
+
+from jobs.queue import enqueue
+from recipes.loaders import load_ingredients
 
 
 class Command(BaseCommand):
     help = "load ingredients.csv"
+    requires_system_checks = []
 
-    def handle(self, *args, **kwargs):
-
-        with open(f'{settings.BASE_DIR}/recipes/data/ingredients.csv',
-                  'r', encoding='utf-8') as file:
-            file_reader = csv.reader(file)
-            next(file_reader)
+    def add_arguments(self, parser):
+        parser.add_argument('--path')
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Поставить загрузку в очередь фоновых задач.',
+        )
 
-            for row in file_reader:
-                name, measurement_unit = row
-                Ingredient.objects.get_or_create(
-                    name=name,
-                    measurement_unit=measurement_unit,
-                )
-        self.stdout.write(self.style.SUCCESS('Ингредиенты добавлены'))
+    def handle(self, *args, **options):
+        if options['background']:
+            job = enqueue(
+                'recipes.load_ingredients', {'path': options['path']}
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f'Загрузка поставлена в очередь: {job}')
+            )
+            return
+        created = load_ingredients(options['path'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Ингредиенты добавлены: {created}')
+        )
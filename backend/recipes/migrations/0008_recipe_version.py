@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:50
+
+from django.db import migrations, models
+
+
+def drop_documents(apps, schema_editor):
+    # Документы без версии пересоберутся при первом обращении.
+    apps.get_model('recipes', 'RecipeDocument').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_image_content_addressed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(drop_documents, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 CustomUser = get_user_model()
 
 
@@ -14,6 +16,21 @@ class Ingredient (models.Model):
     measurement_unit = models.CharField(
         max_length=16,
     )
+    kcal = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+    )
+    protein = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+    )
+    price = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+    )
 
     class Meta:
         ordering = ('name', )
@@ -31,10 +48,35 @@ class Tag(models.Model):
         max_length=settings.TAG_MAX_LENGTH,
         unique=True,
     )
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('name', )
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit = get_free_tag_bit()
+        super().save(*args, **kwargs)
+
+
+def get_free_tag_bit():
+    used = set(Tag.objects.exclude(bit=None).values_list('bit', flat=True))
+    for bit in range(settings.TAG_MASK_BITS):
+        if bit not in used:
+            return bit
+    return None
+
+
+class ActiveRecipeManager(models.Manager):
+    """Рецепты без отметки об удалении; удалённые видит all_objects."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted__isnull=True)
+
 
 class Recipe(models.Model):
     author = models.ForeignKey(
@@ -47,6 +89,8 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='images/',
+        storage=ContentAddressedStorage(),
+        db_index=True,
     )
     text = models.TextField()
     ingredients = models.ManyToManyField(
@@ -62,9 +106,28 @@ class Recipe(models.Model):
         validators=[MinValueValidator(1)],
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Условие tags_mask & N обычный индекс не использует, поэтому поле
+    # не индексируется: оно лишь заменяет соединение с тегами.
+    tags_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+    )
+    deleted = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ActiveRecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date', )
+        indexes = [
+            # Ищет рецепты, ждущие очистки; живых строк в индексе нет.
+            models.Index(
+                fields=('deleted', ), name='recipe_deleted_idx',
+                condition=models.Q(deleted__isnull=False),
+            ),
+        ]
 
 
 class IngredientsInRecipe(models.Model):
@@ -132,3 +195,44 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_cart'
             )
         ]
+
+
+class RecipeDocument(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document',
+    )
+    document = models.JSONField()
+    updated = models.DateTimeField(auto_now=True)
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField()
+    computed = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ('recipe', '-score')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx'
+            ),
+        ]
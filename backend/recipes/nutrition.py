@@ -0,0 +1,86 @@
+import numpy as np
+
+from .loaders import NUTRITION_FIELDS
+from .models import Ingredient, IngredientsInRecipe
+
+
+class IngredientTable:
+    """
+    Атрибуты ингредиентов в виде плотной матрицы id × (kcal, protein,
+    price); отсутствующие значения хранятся как NaN.
+    """
+
+    def __init__(self, ingredient_ids):
+        self.ids = np.unique(ingredient_ids)
+        self.values = np.full(
+            (self.ids.size, len(NUTRITION_FIELDS)), np.nan
+        )
+        if not self.ids.size:
+            return
+        rows = list(
+            Ingredient.objects.filter(id__in=self.ids.tolist())
+            .values_list('id', *NUTRITION_FIELDS)
+        )
+        if rows:
+            data = np.array(rows, dtype=np.float64)
+            positions = np.searchsorted(self.ids, data[:, 0].astype(np.int64))
+            self.values[positions] = data[:, 1:]
+
+    def lookup(self, ingredient_ids):
+        return self.values[np.searchsorted(self.ids, ingredient_ids)]
+
+
+def load_amounts(queryset):
+    """(ingredient_id, amount) строк IngredientsInRecipe в виде массивов."""
+    pairs = np.array(
+        list(queryset.values_list('ingredient_id', 'amount')),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1].astype(np.float64)
+
+
+def aggregate_nutrition(queryset):
+    """
+    Итоги kcal, protein и price по строкам IngredientsInRecipe.
+
+    Количество ингредиентов умножается на значения атрибутов на единицу
+    измерения одной матричной операцией; ингредиенты без значения
+    атрибута пропускаются и учитываются в missing.
+    """
+    ingredient_ids, amounts = load_amounts(queryset)
+    table = IngredientTable(ingredient_ids)
+    values = table.lookup(ingredient_ids)
+    totals = np.nansum(values * amounts[:, np.newaxis], axis=0)
+    missing = np.isnan(values)
+    result = {
+        field: round(float(total), 2)
+        for field, total in zip(NUTRITION_FIELDS, totals)
+    }
+    result['missing'] = {
+        field: int(np.unique(ingredient_ids[missing[:, index]]).size)
+        for index, field in enumerate(NUTRITION_FIELDS)
+    }
+    return result
+
+
+def recipe_nutrition(recipe_id):
+    return aggregate_nutrition(
+        IngredientsInRecipe.objects.filter(recipe_id=recipe_id)
+    )
+
+
+def shopping_cart_nutrition(user_id):
+    return aggregate_nutrition(
+        IngredientsInRecipe.objects.filter(
+            recipe__shopping_cart__user_id=user_id,
+            recipe__deleted__isnull=True,
+        )
+    )
+
+
+def favorites_nutrition(user_id):
+    return aggregate_nutrition(
+        IngredientsInRecipe.objects.filter(
+            recipe__favorites__user_id=user_id, recipe__deleted__isnull=True
+        )
+    )
@@ -0,0 +1,170 @@
+"""
+Поиск ингредиентов для автодополнения.
+
+Названия держатся в памяти процесса в трёх структурах: отсортированный
+список полных названий (совпадение с началом названия), отсортированный
+список остальных слов (совпадение с началом слова) и триграммный индекс
+для запросов с опечатками. Ярусы проверяются по порядку, и поиск
+останавливается, как только набрано limit результатов.
+
+Индекс перестраивается, когда в общем кеше меняется его версия или он
+старше INGREDIENT_INDEX_TTL: с локальным кешем так другие процессы
+увидят изменения справочника не позже чем через это время.
+"""
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from caching.shared import bump_version, get_versions
+from .models import Ingredient
+
+INDEX_VERSION_KEY = 'catalog:ingredients:version'
+WORDS = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(WORDS.findall(text.lower().replace('ё', 'е')))
+
+
+def trigrams(word):
+    """Триграммы слова с пробелом в начале: хвост слова открыт."""
+    word = f' {word}'
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def prefix_distance(query, word, limit):
+    """
+    Расстояние Левенштейна от query до ближайшего префикса word или
+    limit + 1, если оно больше limit.
+    """
+    previous = list(range(len(word) + 1))
+    for i, char in enumerate(query, 1):
+        current = [i]
+        for j, other in enumerate(word, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != other),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(min(previous), limit + 1)
+
+
+class IngredientIndex:
+
+    def __init__(self, rows):
+        self.names = sorted(
+            (normalize(name), pk) for pk, name in rows
+        )
+        self.words = {}
+        word_prefixes = []
+        grams = {}
+        for name, pk in self.names:
+            words = name.split()
+            self.words[pk] = words
+            word_prefixes.extend((word, pk) for word in words[1:])
+            for gram in set().union(*map(trigrams, words)):
+                grams.setdefault(gram, []).append(pk)
+        word_prefixes.sort()
+        self.word_prefixes = word_prefixes
+        self.grams = grams
+
+    @staticmethod
+    def scan_prefix(items, query, found, limit):
+        start = bisect.bisect_left(items, (query, ))
+        for text, pk in items[start:]:
+            if len(found) >= limit or not text.startswith(query):
+                return
+            if pk not in found:
+                found[pk] = None
+
+    def fuzzy(self, query, found, limit):
+        max_typos = settings.INGREDIENT_SEARCH_MAX_TYPOS
+        if len(query) > 5:
+            max_typos += 1
+        query_grams = trigrams(query)
+        # Каждая правка портит не больше трёх триграмм.
+        min_shared = max(1, len(query_grams) - 3 * max_typos)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        matches = []
+        last_shared = None
+        for pk, count in shared.most_common():
+            if count < min_shared:
+                break
+            if len(matches) >= limit - len(found) and count < last_shared:
+                break
+            if pk in found:
+                continue
+            words = self.words[pk]
+            # Опечатка в первом слове важнее, чем в последующих.
+            distance, position = min(
+                (prefix_distance(query, word, max_typos), position)
+                for position, word in enumerate(words)
+            )
+            if distance <= max_typos:
+                matches.append((
+                    distance, position, -count, len(words), pk
+                ))
+                last_shared = count
+        for *_, pk in sorted(matches)[:limit - len(found)]:
+            found[pk] = None
+
+    def search(self, query, limit):
+        """
+        id ингредиентов по убыванию релевантности: начало названия,
+        начало слова, затем совпадения с опечатками.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        found = {}
+        self.scan_prefix(self.names, query, found, limit)
+        if ' ' not in query:
+            self.scan_prefix(self.word_prefixes, query, found, limit)
+            if (len(found) < limit
+                    and len(query) >= settings.INGREDIENT_FUZZY_MIN_LENGTH):
+                self.fuzzy(query, found, limit)
+        return list(found)
+
+
+_index = None
+_index_version = None
+_index_built = 0
+_lock = threading.Lock()
+
+
+def index_is_stale(version):
+    return (
+        _index is None or version != _index_version
+        or time.monotonic() - _index_built > settings.INGREDIENT_INDEX_TTL
+    )
+
+
+def get_ingredient_index():
+    global _index, _index_version, _index_built
+    version, = get_versions([INDEX_VERSION_KEY])
+    if index_is_stale(version):
+        with _lock:
+            if index_is_stale(version):
+                _index = IngredientIndex(
+                    Ingredient.objects.values_list('id', 'name')
+                )
+                _index_version = version
+                _index_built = time.monotonic()
+    return _index
+
+
+def invalidate_ingredient_index():
+    bump_version(INDEX_VERSION_KEY)
+
+
+def search_ingredients(query, limit):
+    return get_ingredient_index().search(query, limit)
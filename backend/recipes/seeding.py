@@ -0,0 +1,255 @@
+"""
+Генерация синтетического набора данных, похожего на рабочий.
+
+Популярность авторов, тегов, ингредиентов и рецептов распределена по
+закону Ципфа: немногие объекты встречаются очень часто, большинство —
+редко, как в реальном трафике. Строки пишутся пачками через
+insert_with_ids и insert_rows из recipes.corpus.
+"""
+import base64
+import bisect
+import datetime
+import itertools
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import Subscription
+from .corpus import insert_rows, insert_with_ids, preserved_pub_date
+from .loaders import load_ingredients
+from .models import (
+    Favorite, Ingredient, IngredientsInRecipe, Recipe, ShoppingCart, Tag
+)
+
+CustomUser = get_user_model()
+
+PLACEHOLDER_IMAGE = 'images/seed-placeholder.png'
+PLACEHOLDER_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8Dw'
+    'HwAFBQIAX8jx0gAAAABJRU5ErkJggg=='
+)
+TAG_COLORS = (
+    '#E26C2D', '#49B64E', '#8775D2', '#F4C430', '#2E86C1', '#C0392B',
+    '#16A085', '#7F8C8D', '#D35400', '#8E44AD', '#27AE60', '#2C3E50',
+)
+
+
+class ZipfSampler:
+    """Выбор элементов population с весами 1 / rank ** exponent."""
+
+    def __init__(self, population, exponent, rng):
+        self.population = list(population)
+        self.rng = rng
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank ** exponent
+            for rank in range(1, len(self.population) + 1)
+        ))
+
+    def one(self):
+        point = self.rng.random() * self.cum_weights[-1]
+        return self.population[
+            bisect.bisect(self.cum_weights, point)
+        ]
+
+    def distinct(self, size, exclude=None):
+        """До size разных элементов; редкие повторы просто отбрасываются."""
+        size = min(size, len(self.population))
+        chosen = set()
+        for _ in range(size * 4):
+            item = self.one()
+            if item != exclude:
+                chosen.add(item)
+            if len(chosen) >= size:
+                break
+        return chosen
+
+
+class DatasetSeeder:
+
+    def __init__(self, prefix='seed', password='seed-password',
+                 exponent=1.1, batch_size=5000, seed=None, log=None):
+        self.prefix = prefix
+        self.password = password
+        self.exponent = exponent
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def sampler(self, population):
+        population = list(population)
+        self.rng.shuffle(population)
+        return ZipfSampler(population, self.exponent, self.rng)
+
+    def run(self, users, recipes, tags, favorites, carts, subscriptions,
+            ingredients_per_recipe=(3, 10)):
+        if not Ingredient.objects.exists():
+            self.log(f'Ингредиенты загружены: {load_ingredients()}')
+        tag_bits = self.create_tags(tags)
+        user_ids = self.create_users(users)
+        recipe_ids = self.create_recipes(
+            recipes, user_ids, tag_bits, ingredients_per_recipe
+        )
+        recipe_sampler = self.sampler(recipe_ids)
+        author_sampler = self.sampler(user_ids)
+        self.create_links(
+            Favorite, ('user_id', 'recipe_id'), user_ids, recipe_sampler,
+            favorites
+        )
+        self.create_links(
+            ShoppingCart, ('user_id', 'recipe_id'), user_ids, recipe_sampler,
+            carts
+        )
+        self.create_links(
+            Subscription, ('user_id', 'author_id'), user_ids, author_sampler,
+            subscriptions, exclude_self=True
+        )
+        return self.counts
+
+    def create_tags(self, count):
+        """Теги создаются через save(), чтобы получить бит маски."""
+        for number in range(count):
+            slug = f'{self.prefix}-tag-{number}'
+            if not Tag.objects.filter(slug=slug).exists():
+                Tag.objects.create(
+                    name=f'{self.prefix} tag {number}',
+                    slug=slug,
+                    color=self.free_color(number),
+                )
+        tag_bits = dict(Tag.objects.filter(
+            slug__startswith=f'{self.prefix}-tag-'
+        ).values_list('id', 'bit'))
+        self.counts['tags'] = len(tag_bits)
+        return tag_bits
+
+    def free_color(self, number):
+        used = set(Tag.objects.values_list('color', flat=True))
+        for color in itertools.chain(TAG_COLORS, (
+            f'#{self.rng.randrange(0x1000000):06X}' for _ in range(100)
+        )):
+            if color not in used:
+                return color
+        return f'#{number:06X}'
+
+    def create_users(self, count):
+        start = CustomUser.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).count()
+        # Хеш пароля дорог: один на всех пользователей набора.
+        password = make_password(self.password)
+        now = timezone.now()
+        users = [
+            CustomUser(
+                username=f'{self.prefix}_{number}',
+                email=f'{self.prefix}_{number}@example.com',
+                first_name='Seed',
+                last_name=f'User {number}',
+                password=password,
+                date_joined=now,
+            )
+            for number in range(start, start + count)
+        ]
+        user_ids = []
+        for batch in self.batches(users):
+            with transaction.atomic():
+                insert_with_ids(CustomUser, batch)
+            user_ids.extend(user.pk for user in batch)
+        self.counts['users'] = len(user_ids)
+        return user_ids
+
+    def create_recipes(self, count, user_ids, tag_bits,
+                       ingredients_per_recipe):
+        # Одно изображение на все рецепты: хранилище вернёт имя по хешу.
+        image = Recipe._meta.get_field('image').storage.save(
+            PLACEHOLDER_IMAGE, ContentFile(PLACEHOLDER_PNG)
+        )
+        authors = self.sampler(user_ids)
+        tags = self.sampler(tag_bits)
+        ingredients = self.sampler(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        now = timezone.now()
+        recipe_ids = []
+        for start in range(0, count, self.batch_size):
+            recipes = []
+            links = []
+            for number in range(start, min(count, start + self.batch_size)):
+                recipe_tags = tags.distinct(self.rng.randint(1, 3))
+                mask = 0
+                for tag_id in recipe_tags:
+                    if tag_bits[tag_id] is not None:
+                        mask |= 1 << tag_bits[tag_id]
+                recipes.append(Recipe(
+                    author_id=authors.one(),
+                    name=f'{self.prefix} recipe {number}',
+                    image=image,
+                    text='Синтетический рецепт для нагрузочных тестов.',
+                    cooking_time=self.rng.randint(5, 180),
+                    pub_date=now - datetime.timedelta(
+                        seconds=self.rng.randrange(365 * 24 * 3600)
+                    ),
+                    tags_mask=mask,
+                ))
+                links.append((
+                    recipe_tags,
+                    ingredients.distinct(
+                        self.rng.randint(*ingredients_per_recipe)
+                    ),
+                ))
+            with transaction.atomic(), preserved_pub_date():
+                insert_with_ids(Recipe, recipes)
+                insert_rows(
+                    Recipe.tags.through, ('recipe_id', 'tag_id'),
+                    [
+                        (recipe.pk, tag_id)
+                        for recipe, (recipe_tags, _) in zip(recipes, links)
+                        for tag_id in recipe_tags
+                    ]
+                )
+                insert_rows(
+                    IngredientsInRecipe,
+                    ('recipe_id', 'ingredient_id', 'amount'),
+                    [
+                        (recipe.pk, ingredient_id, self.rng.randint(1, 500))
+                        for recipe, (_, recipe_ingredients)
+                        in zip(recipes, links)
+                        for ingredient_id in recipe_ingredients
+                    ]
+                )
+            recipe_ids.extend(recipe.pk for recipe in recipes)
+            self.log(f'Рецептов создано: {len(recipe_ids)}')
+        self.counts['recipes'] = len(recipe_ids)
+        return recipe_ids
+
+    def create_links(self, model, fields, user_ids, sampler, mean,
+                     exclude_self=False):
+        """Число связей пользователя — геометрическое со средним mean."""
+        total = 0
+        rows = []
+        for user_id in user_ids:
+            size = int(self.rng.expovariate(1 / mean)) if mean else 0
+            exclude = user_id if exclude_self else None
+            rows.extend(
+                (user_id, target) for target in sampler.distinct(
+                    size, exclude=exclude
+                )
+            )
+            if len(rows) >= self.batch_size:
+                total += self.flush_links(model, fields, rows)
+                rows = []
+        total += self.flush_links(model, fields, rows)
+        self.counts[model._meta.model_name] = total
+        return total
+
+    def flush_links(self, model, fields, rows):
+        with transaction.atomic():
+            insert_rows(model, fields, rows)
+        return len(rows)
+
+    def batches(self, items):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save
+)
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from .models import Recipe, Tag
+
+
+def schedule_image_release(name):
+    """
+    Откладывает удаление файла изображения до проверки ссылок.
+
+    Одинаковые файлы общие у разных рецептов, и новый рецепт может
+    сослаться на существующий файл раньше, чем закоммитит строку; задержка
+    IMAGE_RELEASE_DELAY закрывает это окно.
+    """
+    if name:
+        enqueue(
+            'recipes.release_image', {'name': name},
+            delay=settings.IMAGE_RELEASE_DELAY,
+        )
+
+
+def update_tags_mask(recipe_ids):
+    masks = dict.fromkeys(recipe_ids, 0)
+    rows = Recipe.tags.through.objects.filter(
+        recipe_id__in=masks, tag__bit__isnull=False
+    ).values_list('recipe_id', 'tag__bit')
+    for recipe_id, bit in rows:
+        masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        [Recipe(pk=pk, tags_mask=mask) for pk, mask in masks.items()],
+        ['tags_mask'], batch_size=1000
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def keep_tags_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_tags_mask([instance.pk])
+        return
+    if action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipes.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        update_tags_mask(instance.__dict__.pop('_cleared_recipe_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        update_tags_mask(pk_set)
+
+
+@receiver(post_delete, sender=Tag)
+def release_tag_bit(sender, instance, **kwargs):
+    if instance.bit is None:
+        return
+    bit = 1 << instance.bit
+    Recipe.objects.annotate(
+        tag_bit=F('tags_mask').bitand(bit)
+    ).filter(tag_bit=bit).update(tags_mask=F('tags_mask') - bit)
+
+
+@receiver(post_init, sender=Recipe)
+def remember_image(sender, instance, **kwargs):
+    # Отложенное поле не загружаем: __dict__ вместо дескриптора.
+    image = instance.__dict__.get('image')
+    instance._saved_image = getattr(image, 'name', image)
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_image(sender, instance, created, **kwargs):
+    if 'image' not in instance.__dict__:
+        return
+    name = instance.image.name
+    if not created and instance._saved_image not in (None, name):
+        schedule_image_release(instance._saved_image)
+    instance._saved_image = name
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_image(sender, instance, **kwargs):
+    image = instance.__dict__.get('image')
+    schedule_image_release(getattr(image, 'name', image))
@@ -0,0 +1,103 @@
+import numpy as np
+from django.conf import settings
+
+from .models import IngredientsInRecipe, Recipe
+
+
+class FeatureMatrix:
+    """
+    Бинарная разреженная матрица рецепт × признак.
+
+    Хранится одновременно по строкам (CSR: признаки рецепта) и по
+    столбцам (CSC: рецепты с признаком), чтобы пересечение множеств
+    признаков считалось через np.bincount по спискам рецептов.
+    """
+
+    def __init__(self, rows, cols, n_rows, max_df):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        if cols.size:
+            _, cols = np.unique(cols, return_inverse=True)
+            df = np.bincount(cols)
+            keep = df[cols] <= max(1, max_df * n_rows)
+            rows, cols = rows[keep], cols[keep]
+        self.n_rows = n_rows
+        self.row_indptr, self.row_indices = self.compress(rows, cols, n_rows)
+        n_cols = int(cols.max()) + 1 if cols.size else 0
+        self.col_indptr, self.col_indices = self.compress(cols, rows, n_cols)
+        self.norms = np.sqrt(np.diff(self.row_indptr)).astype(np.float64)
+
+    @staticmethod
+    def compress(major, minor, size):
+        order = np.argsort(major, kind='stable')
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(major, minlength=size), out=indptr[1:])
+        return indptr, minor[order]
+
+    def cosine(self, row):
+        """Косинусная близость строки row со всеми строками."""
+        features = self.row_indices[
+            self.row_indptr[row]:self.row_indptr[row + 1]
+        ]
+        if not features.size:
+            return np.zeros(self.n_rows)
+        candidates = np.concatenate([
+            self.col_indices[self.col_indptr[f]:self.col_indptr[f + 1]]
+            for f in features
+        ])
+        overlap = np.bincount(candidates, minlength=self.n_rows)
+        denominator = self.norms * self.norms[row]
+        denominator[denominator == 0] = 1
+        return overlap / denominator
+
+
+class SimilarityModel:
+
+    def __init__(self, max_df=None, tag_weight=None):
+        max_df = max_df or settings.SIMILARITY_MAX_DF
+        self.tag_weight = (
+            settings.SIMILARITY_TAG_WEIGHT if tag_weight is None
+            else tag_weight
+        )
+        self.recipe_ids = np.fromiter(
+            Recipe.objects.order_by('id').values_list('id', flat=True),
+            dtype=np.int64
+        )
+        n_rows = self.recipe_ids.size
+        self.ingredients = FeatureMatrix(
+            *self.load_pairs(IngredientsInRecipe.objects, 'ingredient_id'),
+            n_rows, max_df
+        )
+        self.tags = FeatureMatrix(
+            *self.load_pairs(Recipe.tags.through.objects, 'tag_id'),
+            n_rows, 1.0
+        )
+
+    def load_pairs(self, manager, feature):
+        pairs = np.array(
+            list(manager.filter(recipe__deleted__isnull=True).values_list(
+                'recipe_id', feature
+            )),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        rows = np.searchsorted(self.recipe_ids, pairs[:, 0])
+        return rows, pairs[:, 1]
+
+    def neighbors(self, recipe_id, top_k):
+        """top_k ближайших рецептов: список (recipe_id, score)."""
+        row = np.searchsorted(self.recipe_ids, recipe_id)
+        if row >= self.recipe_ids.size or self.recipe_ids[row] != recipe_id:
+            return []
+        scores = (
+            (1 - self.tag_weight) * self.ingredients.cosine(row)
+            + self.tag_weight * self.tags.cosine(row)
+        )
+        scores[row] = 0
+        candidates = np.flatnonzero(scores)
+        if candidates.size > top_k:
+            best = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[best]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [
+            (int(self.recipe_ids[i]), float(scores[i])) for i in candidates
+        ]
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — SHA-256 его содержимого.
+
+    Файл ложится в <prefix>/ab/cd/<хеш><расширение>; одинаковое
+    содержимое сохраняется один раз, и под одним именем содержимое никогда
+    не меняется, поэтому ответы можно кешировать навсегда. Файл может быть
+    общим для нескольких рецептов, удаляет его только задача
+    recipes.release_image, когда ссылок не осталось.
+    """
+
+    def __init__(self, prefix='images', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        value = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            self.prefix, value[:2], value[2:4], value + extension
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
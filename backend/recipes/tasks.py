@@ -0,0 +1,8 @@
+from jobs.registry import task
+
+from .loaders import load_ingredients
+
+
+@task('recipes.load_ingredients', priority=-5, max_attempts=1)
+def load_ingredients_task(path=None):
+    return {'created': load_ingredients(path)}
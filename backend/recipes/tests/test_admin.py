@@ -0,0 +1,52 @@
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from api.tests.helpers import client_for, create_recipe, create_user
+from recipes.models import Recipe
+
+CHANGELIST = '/admin/recipes/recipe/'
+
+
+class SoftDeleteAdminTests(TestCase):
+
+    def setUp(self):
+        self.admin = create_user('admin', is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.live = create_recipe(self.admin, name='Живой')
+        self.deleted = create_recipe(self.admin, name='Удалённый')
+        Recipe.objects.filter(pk=self.deleted.pk).update(
+            deleted=timezone.now()
+        )
+
+    def names(self, response):
+        return {recipe.name for recipe in response.context['cl'].result_list}
+
+    def test_changelist_query_has_no_soft_delete_condition(self):
+        request = RequestFactory().get(CHANGELIST)
+        request.user = self.admin
+        queryset = site._registry[Recipe].get_queryset(request)
+        self.assertFalse(queryset.query.where)
+
+    def test_user_changelist_filters_deleted(self):
+        response = self.client.get('/admin/users/customuser/', {
+            'deleted': 'yes'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_deleted_recipes_can_be_listed_and_restored(self):
+        response = self.client.get(CHANGELIST)
+        self.assertEqual(self.names(response), {'Живой', 'Удалённый'})
+        response = self.client.get(CHANGELIST, {'deleted': 'yes'})
+        self.assertEqual(self.names(response), {'Удалённый'})
+
+        self.client.post(CHANGELIST, {
+            'action': 'restore', '_selected_action': [self.deleted.pk],
+        })
+
+        restored = Recipe.objects.get(pk=self.deleted.pk)
+        self.assertEqual(restored.version, self.deleted.version + 1)
+        self.assertEqual(
+            client_for().get(f'/api/recipes/{restored.pk}/').status_code, 200
+        )
@@ -0,0 +1,102 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.tests.helpers import CustomUser, create_recipe, create_user
+from recipes.corpus import CorpusImporter, export_corpus
+from recipes.models import (
+    Favorite, Ingredient, IngredientsInRecipe, Recipe, ShoppingCart, Tag
+)
+from users.models import Subscription
+
+
+class CorpusRoundTripTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        image = default_storage.save('images/soup.png', ContentFile(b'png'))
+        alice = create_user('alice')
+        bob = create_user('bob')
+        tag = Tag.objects.create(name='Обед', color='#E26C2D', slug='lunch')
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        recipe = create_recipe(alice, name='Суп', image=image)
+        recipe.tags.add(tag)
+        IngredientsInRecipe.objects.create(
+            recipe=recipe, ingredient=salt, amount=5
+        )
+        Favorite.objects.create(user=bob, recipe=recipe)
+        ShoppingCart.objects.create(user=bob, recipe=recipe)
+        Subscription.objects.create(user=bob, author=alice)
+
+        carol = create_user('carol')
+        create_recipe(carol, name='Рецепт удалённого автора')
+        CustomUser.all_objects.filter(pk=carol.pk).update(
+            deleted=timezone.now()
+        )
+
+    def snapshot(self):
+        return {
+            'recipes': set(Recipe.objects.values_list(
+                'author__username', 'name', 'pub_date', 'tags__slug'
+            )),
+            'ingredients': set(IngredientsInRecipe.objects.values_list(
+                'recipe__name', 'ingredient__name', 'amount'
+            )),
+            'favorites': set(Favorite.objects.values_list(
+                'user__username', 'recipe__name'
+            )),
+            'carts': set(ShoppingCart.objects.values_list(
+                'user__username', 'recipe__name'
+            )),
+            'subscriptions': set(Subscription.objects.values_list(
+                'user__username', 'author__username'
+            )),
+        }
+
+    def export(self):
+        archive = io.BytesIO()
+        export_corpus(archive)
+        archive.seek(0)
+        return archive
+
+    def test_round_trip_into_empty_database(self):
+        archive = self.export()
+        expected = self.snapshot()
+        expected['recipes'] = {
+            row for row in expected['recipes'] if row[0] != 'carol'
+        }
+        Recipe.all_objects.all().delete()
+        CustomUser.all_objects.all().delete()
+        Tag.objects.all().delete()
+        Ingredient.objects.all().delete()
+        default_storage.delete('images/soup.png')
+
+        counts = CorpusImporter().run(archive)
+
+        self.assertEqual(counts['recipes'], 1)
+        self.assertEqual(self.snapshot(), expected)
+        image = Recipe.objects.get().image
+        with image.open('rb') as file:
+            self.assertEqual(file.read(), b'png')
+
+    def test_repeated_import_does_not_duplicate(self):
+        archive = self.export()
+        expected = self.snapshot()
+
+        CorpusImporter().run(archive)
+        archive.seek(0)
+        CorpusImporter().run(archive)
+
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(Favorite.objects.count(), 1)
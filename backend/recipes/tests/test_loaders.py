@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.test import TestCase
+
+from recipes.loaders import load_ingredients
+from recipes.models import Ingredient
+
+
+class LoadIngredientsTests(TestCase):
+
+    def load(self, *rows):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', encoding='utf-8', delete=False
+        ) as file:
+            file.write('name,measurement_unit,kcal,protein,price\n')
+            file.writelines(f'{row}\n' for row in rows)
+        self.addCleanup(os.remove, file.name)
+        return load_ingredients(file.name)
+
+    def test_updates_only_supplied_columns(self):
+        flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г', kcal=3.4, protein=0.1,
+            price=0.05,
+        )
+        milk = Ingredient.objects.create(
+            name='молоко', measurement_unit='мл', kcal=0.6, protein=0.03,
+        )
+        salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г', price=0.02,
+        )
+
+        created = self.load(
+            'мука,г,,0.12,', 'молоко,мл,0.5', 'соль,г', 'сахар,г,4,,0.1',
+        )
+
+        self.assertEqual(created, 1)
+        flour.refresh_from_db()
+        milk.refresh_from_db()
+        salt.refresh_from_db()
+        self.assertEqual(
+            (flour.kcal, flour.protein, flour.price), (3.4, 0.12, 0.05)
+        )
+        self.assertEqual((milk.kcal, milk.protein), (0.5, 0.03))
+        self.assertEqual(salt.price, 0.02)
+        sugar = Ingredient.objects.get(name='сахар')
+        self.assertEqual(
+            (sugar.kcal, sugar.protein, sugar.price), (4, None, 0.1)
+        )
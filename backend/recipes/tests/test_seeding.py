@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipes.models import IngredientsInRecipe, Recipe
+
+
+class SeedDatasetTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_several_batches_are_inserted(self):
+        call_command(
+            'seed_dataset', users=5, recipes=30, batch_size=10, seed=1,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Recipe.objects.count(), 30)
+        self.assertEqual(
+            IngredientsInRecipe.objects.values('recipe').distinct().count(),
+            30,
+        )
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.tests.helpers import create_recipe, create_user
+from recipes.models import (
+    Ingredient, IngredientsInRecipe, Recipe, SimilarRecipe
+)
+
+
+@override_settings(SIMILARITY_MAX_DF=1.0)
+class IncrementalSimilarRecipesTests(TestCase):
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(5)
+        ]
+        self.first = self.create({0, 1})
+        self.second = self.create({0, 1, 2})
+        self.third = self.create({1, 3})
+        self.fourth = self.create({4})
+        self.build('--full')
+
+    def create(self, ingredients):
+        recipe = create_recipe(self.author)
+        self.set_ingredients(recipe, ingredients)
+        return recipe
+
+    def set_ingredients(self, recipe, ingredients):
+        IngredientsInRecipe.objects.filter(recipe=recipe).delete()
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(
+                recipe=recipe, ingredient=self.ingredients[i], amount=1
+            )
+            for i in ingredients
+        )
+
+    def build(self, *args):
+        call_command('build_similar_recipes', *args, stdout=StringIO())
+
+    def similar_to(self, recipe):
+        return set(SimilarRecipe.objects.filter(
+            recipe=recipe
+        ).values_list('similar_id', flat=True))
+
+    def test_recipe_that_became_dissimilar_leaves_neighbor_lists(self):
+        self.assertIn(self.second.id, self.similar_to(self.first))
+        self.set_ingredients(self.second, {4})
+        self.second.save()
+
+        self.build()
+
+        self.assertEqual(self.similar_to(self.first), {self.third.id})
+        self.assertEqual(self.similar_to(self.second), {self.fourth.id})
+
+    def test_deleted_recipe_leaves_neighbor_lists(self):
+        self.assertIn(self.third.id, self.similar_to(self.first))
+        Recipe.all_objects.filter(pk=self.third.pk).update(
+            deleted=timezone.now()
+        )
+
+        self.build()
+
+        self.assertEqual(self.similar_to(self.first), {self.second.id})
+        self.assertEqual(self.similar_to(self.third), set())
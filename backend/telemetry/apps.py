@@ -0,0 +1,21 @@
+import atexit
+
+from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+
+
+class TelemetryConfig(AppConfig):
+    name = 'telemetry'
+
+    def ready(self):
+        from telemetry.queries import install_wrapper
+        from telemetry.recorder import flush, flush_if_due
+
+        connection_created.connect(
+            install_wrapper, dispatch_uid='telemetry_slow_queries'
+        )
+        request_finished.connect(
+            flush_if_due, dispatch_uid='telemetry_flush'
+        )
+        atexit.register(flush)
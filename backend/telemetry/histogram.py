@@ -0,0 +1,90 @@
+class LatencyHistogram:
+    """
+    Гистограмма задержек в духе HdrHistogram.
+
+    Значения в микросекундах раскладываются по степеням двойки, каждая
+    степень делится на линейные корзины: память постоянна (около 400
+    счётчиков до MAX_VALUE), относительная ошибка не больше
+    2 ** -(SUB_BUCKET_BITS - 1).
+    """
+
+    SUB_BUCKET_BITS = 5
+    MAX_VALUE = 2 ** 27 - 1  # чуть больше двух минут
+
+    def __init__(self):
+        self.counts = [0] * (self.index(self.MAX_VALUE) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    @classmethod
+    def index(cls, value):
+        bits = cls.SUB_BUCKET_BITS
+        if value < 1 << bits:
+            return value
+        exponent = value.bit_length() - bits
+        return (
+            (1 << bits) + (exponent - 1) * (1 << bits - 1)
+            + (value >> exponent) - (1 << bits - 1)
+        )
+
+    @classmethod
+    def highest_equivalent(cls, index):
+        """Наибольшее значение, попадающее в корзину index."""
+        bits = cls.SUB_BUCKET_BITS
+        if index < 1 << bits:
+            return index
+        exponent, sub = divmod(index - (1 << bits), 1 << bits - 1)
+        exponent += 1
+        return ((sub + (1 << bits - 1) + 1) << exponent) - 1
+
+    def record(self, value):
+        value = min(max(int(value), 0), self.MAX_VALUE)
+        self.counts[self.index(value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.highest_equivalent(index), self.max)
+        return self.max
+
+    def count_at_most(self, value):
+        """Сколько значений не больше value (с точностью до корзины)."""
+        last = self.index(min(max(int(value), 0), self.MAX_VALUE))
+        return sum(self.counts[:last + 1])
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        return {
+            'counts': {
+                str(index): count
+                for index, count in enumerate(self.counts) if count
+            },
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        for index, count in data['counts'].items():
+            histogram.counts[int(index)] = count
+        histogram.count = data['count']
+        histogram.sum = data['sum']
+        histogram.max = data['max']
+        return histogram
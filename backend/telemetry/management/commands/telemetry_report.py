@@ -0,0 +1,73 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from telemetry.recorder import PERCENTILES, load_snapshots, merge_snapshots
+
+
+class Command(BaseCommand):
+    help = "print route latency percentiles and the slowest queries"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', default=settings.TELEMETRY_DIR,
+            help='Каталог со снимками процессов.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько медленных запросов показать.',
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести сводку в JSON.',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить снимки после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        report = merge_snapshots(load_snapshots(options['dir']))
+        report['slow_queries'] = report['slow_queries'][:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False))
+        else:
+            self.write_routes(report['routes'])
+            self.write_queries(report['slow_queries'])
+        if options['clear']:
+            for name in os.listdir(options['dir']):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(options['dir'], name))
+
+    def write_routes(self, routes):
+        columns = [f'p{percent:g}' for percent in PERCENTILES]
+        self.stdout.write(
+            f'{"route":<48} {"count":>8} '
+            + ' '.join(f'{column:>8}' for column in columns)
+            + f' {"max":>8} {"5xx":>6} {"slo":>7}'
+        )
+        for route in routes:
+            self.stdout.write(
+                f'{route["route"]:<48} {route["count"]:>8} '
+                + ' '.join(
+                    f'{route[f"{column}_ms"]:>8.1f}' for column in columns
+                )
+                + f' {route["max_ms"]:>8.1f} {route["errors"]:>6}'
+                f' {route["slo_ratio"]:>7.2%}'
+            )
+
+    def write_queries(self, queries):
+        for entry in queries:
+            route = entry['route'] or 'вне запроса'
+            self.stdout.write('')
+            self.stdout.write(self.style.WARNING(
+                f'{entry["total_ms"]:.0f} мс всего, {entry["count"]} раз, '
+                f'максимум {entry["max_ms"]:.0f} мс, {route}'
+            ))
+            self.stdout.write(entry['sql'])
+            self.stdout.write(f'  params: {", ".join(entry["params"])}')
+            for frame in entry['stack']:
+                self.stdout.write(f'  {frame}')
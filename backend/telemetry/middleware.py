@@ -0,0 +1,32 @@
+import time
+
+from .recorder import current, route_latencies
+
+
+class TelemetryMiddleware:
+    """
+    Записывает время ответа в гистограмму маршрута.
+
+    Маршрут — это метод и имя URL-шаблона, а не сам путь, чтобы число
+    гистограмм не росло вместе с числом id. Запросы мимо urlconf
+    учитываются под именем «unresolved».
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        current.path = f'{request.method} {request.path}'
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.path = None
+        microseconds = (time.perf_counter() - started) * 1_000_000
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        route_latencies.record(
+            f'{request.method} {view_name}', microseconds,
+            response.status_code
+        )
+        return response
@@ -0,0 +1,81 @@
+"""
+Журнал медленных SQL-запросов.
+
+Обёртка из connection.execute_wrappers замеряет каждый запрос; те, что
+дольше SLOW_QUERY_MS, попадают в журнал под нормализованным текстом, где
+литералы и параметры заменены на ?, а списки IN свёрнуты. Значения
+параметров не сохраняются: среди них бывают ключи токенов и хеши
+паролей, а журнал пишется на диск и отдаётся через API. Вместо них
+записываются типы.
+"""
+import os
+import re
+import time
+import traceback
+
+from django.conf import settings
+
+from .recorder import current, slow_queries
+
+LITERALS = re.compile(
+    r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\$\d+"
+)
+IN_LISTS = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+MAX_PARAMS = 20
+STACK_DEPTH = 8
+
+PROJECT_DIR = str(settings.BASE_DIR) + os.sep
+TELEMETRY_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def normalize_sql(sql):
+    sql = LITERALS.sub('?', sql)
+    sql = IN_LISTS.sub('IN (...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def call_site():
+    """Кадры стека из кода проекта, от внешнего к месту запроса."""
+    frames = [
+        f'{os.path.relpath(frame.filename, PROJECT_DIR)}:{frame.lineno} '
+        f'{frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(PROJECT_DIR)
+        and not frame.filename.startswith(TELEMETRY_DIR)
+    ]
+    return frames[-STACK_DEPTH:]
+
+
+def describe_params(params, many):
+    """Типы параметров без значений: ['int', 'str(40)', ...]."""
+    if many:
+        params = next(iter(params), ())
+    if isinstance(params, dict):
+        params = params.values()
+    return [
+        f'{type(value).__name__}({len(value)})'
+        if isinstance(value, (str, bytes)) else type(value).__name__
+        for value in list(params or ())[:MAX_PARAMS]
+    ]
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        milliseconds = (time.perf_counter() - started) * 1000
+        if milliseconds >= settings.SLOW_QUERY_MS:
+            slow_queries.add(
+                normalize_sql(sql),
+                describe_params(params, many),
+                milliseconds,
+                call_site(),
+                getattr(current, 'path', None),
+            )
+
+
+def install_wrapper(connection, **kwargs):
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
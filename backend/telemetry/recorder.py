@@ -0,0 +1,242 @@
+"""
+Телеметрия внутри процесса: задержки маршрутов и журнал медленных SQL.
+
+Каждый процесс копит данные в памяти и раз в TELEMETRY_FLUSH_INTERVAL
+секунд записывает снимок в TELEMETRY_DIR/<host>-<pid>.json; команда
+telemetry_report сводит снимки всех процессов.
+"""
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+
+from .histogram import LatencyHistogram
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class RouteLatencies:
+    """Гистограммы задержек по ключу «метод имя_маршрута»."""
+
+    def __init__(self):
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, microseconds, status_code):
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = {
+                    'histogram': LatencyHistogram(), 'errors': 0,
+                }
+            stats['histogram'].record(microseconds)
+            if status_code >= 500:
+                stats['errors'] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                route: {
+                    'histogram': stats['histogram'].to_dict(),
+                    'errors': stats['errors'],
+                }
+                for route, stats in self.routes.items()
+            }
+
+
+class SlowQueryLog:
+    """
+    Медленные запросы, сгруппированные по нормализованному SQL.
+
+    Для каждой группы хранятся число и суммарное время, а параметры,
+    место вызова и маршрут — у самого медленного выполнения. Когда групп
+    больше max_size, вытесняется группа с наименьшим суммарным временем.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.queries = {}
+        self._lock = threading.Lock()
+
+    def add(self, sql, params, milliseconds, stack, route):
+        with self._lock:
+            entry = self.queries.get(sql)
+            if entry is None:
+                if len(self.queries) >= self.max_size:
+                    del self.queries[min(
+                        self.queries,
+                        key=lambda key: self.queries[key]['total_ms']
+                    )]
+                entry = self.queries[sql] = {
+                    'sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += milliseconds
+            if milliseconds >= entry['max_ms']:
+                entry.update(
+                    max_ms=milliseconds, params=params, stack=stack,
+                    route=route,
+                )
+
+    def to_list(self):
+        with self._lock:
+            return [dict(entry) for entry in self.queries.values()]
+
+
+route_latencies = RouteLatencies()
+slow_queries = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
+current = threading.local()
+started = time.time()
+last_flush = time.monotonic()
+
+
+def snapshot():
+    return {
+        'host': socket.gethostname(),
+        'pid': os.getpid(),
+        'started': started,
+        'taken': time.time(),
+        'routes': route_latencies.to_dict(),
+        'slow_queries': slow_queries.to_list(),
+    }
+
+
+def snapshot_path():
+    return os.path.join(
+        settings.TELEMETRY_DIR, f'{socket.gethostname()}-{os.getpid()}.json'
+    )
+
+
+def flush(**kwargs):
+    global last_flush
+    last_flush = time.monotonic()
+    directory = settings.TELEMETRY_DIR
+    if not directory or not (route_latencies.routes or slow_queries.queries):
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path()
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(snapshot(), file)
+    os.replace(f'{path}.tmp', path)
+
+
+def flush_if_due(**kwargs):
+    if time.monotonic() - last_flush >= settings.TELEMETRY_FLUSH_INTERVAL:
+        flush()
+
+
+def summarize_route(route, histogram, errors):
+    slo_ms = settings.TELEMETRY_SLO_TARGETS.get(
+        route, settings.TELEMETRY_SLO_MS
+    )
+    count = histogram.count or 1
+    return {
+        'route': route,
+        'count': histogram.count,
+        'errors': errors,
+        'mean_ms': histogram.sum / count / 1000,
+        **{
+            f'p{percent:g}_ms': histogram.percentile(percent) / 1000
+            for percent in PERCENTILES
+        },
+        'max_ms': histogram.max / 1000,
+        'slo_ms': slo_ms,
+        'slo_ratio': histogram.count_at_most(slo_ms * 1000) / count,
+    }
+
+
+def merge_snapshots(snapshots):
+    """Сводит снимки процессов в итог по маршрутам и запросам."""
+    routes = {}
+    queries = {}
+    for data in snapshots:
+        for route, stats in data['routes'].items():
+            histogram = LatencyHistogram.from_dict(stats['histogram'])
+            if route in routes:
+                routes[route]['histogram'].merge(histogram)
+                routes[route]['errors'] += stats['errors']
+            else:
+                routes[route] = {
+                    'histogram': histogram, 'errors': stats['errors'],
+                }
+        for entry in data['slow_queries']:
+            merged = queries.get(entry['sql'])
+            if merged is None:
+                queries[entry['sql']] = dict(entry)
+                continue
+            merged['count'] += entry['count']
+            merged['total_ms'] += entry['total_ms']
+            if entry['max_ms'] > merged['max_ms']:
+                merged.update(
+                    {key: entry[key] for key in (
+                        'max_ms', 'params', 'stack', 'route'
+                    )}
+                )
+    return {
+        'routes': sorted(
+            (
+                summarize_route(route, stats['histogram'], stats['errors'])
+                for route, stats in routes.items()
+            ),
+            key=lambda item: -item['count']
+        ),
+        'slow_queries': sorted(
+            queries.values(), key=lambda item: -item['total_ms']
+        ),
+    }
+
+
+def process_is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def snapshot_is_stale(data):
+    """
+    Снимок завершившегося процесса. На своём хосте это проверяется по
+    pid, для других хостов — по возрасту: живой процесс перезаписывает
+    снимок не реже раза в TELEMETRY_FLUSH_INTERVAL, пока получает запросы,
+    а простаивающий запишет его заново из памяти при следующем.
+    """
+    if data['host'] == socket.gethostname():
+        return not process_is_alive(data['pid'])
+    return time.time() - data['taken'] > settings.TELEMETRY_SNAPSHOT_MAX_AGE
+
+
+def load_snapshots(directory):
+    """Снимки процессов; снимки завершившихся процессов удаляются."""
+    snapshots = []
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(directory, name)
+        with open(path) as file:
+            data = json.load(file)
+        if snapshot_is_stale(data):
+            # Тот же снимок мог уже удалить другой читатель.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            continue
+        snapshots.append(data)
+    return snapshots
+
+
+def current_report():
+    """Сводка по всем процессам со свежим снимком текущего."""
+    snapshots = [
+        data for data in load_snapshots(settings.TELEMETRY_DIR)
+        if data['pid'] != os.getpid() or data['host'] != socket.gethostname()
+    ]
+    snapshots.append(snapshot())
+    return merge_snapshots(snapshots)
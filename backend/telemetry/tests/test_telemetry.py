@@ -0,0 +1,79 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from telemetry import recorder
+from telemetry.queries import describe_params
+from api.tests.helpers import client_for, create_user
+
+
+class SlowQueryParamsTests(TestCase):
+
+    def setUp(self):
+        recorder.slow_queries.queries.clear()
+        self.addCleanup(recorder.slow_queries.queries.clear)
+
+    def test_params_are_described_without_values(self):
+        self.assertEqual(
+            describe_params(('secret', 42, None), many=False),
+            ['str(6)', 'int', 'NoneType'],
+        )
+        self.assertEqual(
+            describe_params([('a', 1), ('b', 2)], many=True),
+            ['str(1)', 'int'],
+        )
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_token_keys_do_not_reach_the_log(self):
+        user = create_user('alice')
+        key = Token.objects.create(user=user).key
+        client = client_for()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        client.get('/api/users/me/')
+
+        logged = json.dumps(recorder.slow_queries.to_list())
+        self.assertIn('authtoken_token', logged)
+        self.assertNotIn(key, logged)
+        self.assertNotIn(user.password, logged)
+
+
+class SnapshotPruningTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, **fields):
+        data = {
+            'host': socket.gethostname(), 'pid': os.getpid(),
+            'taken': time.time(), 'routes': {}, 'slow_queries': [],
+            **fields,
+        }
+        with open(os.path.join(self.directory, name), 'w') as file:
+            json.dump(data, file)
+
+    def test_snapshots_of_finished_processes_are_removed(self):
+        finished = subprocess.Popen([sys.executable, '-c', ''])
+        finished.wait()
+        self.write('alive.json')
+        self.write('dead.json', pid=finished.pid)
+        self.write('other-fresh.json', host='other', pid=1)
+        self.write(
+            'other-old.json', host='other', pid=1, taken=time.time() - 3600
+        )
+
+        snapshots = recorder.load_snapshots(self.directory)
+
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['alive.json', 'other-fresh.json'],
+        )
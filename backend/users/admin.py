@@ -1,21 +1,27 @@
 from django.contrib import admin
 
+from recipes.admin_utils import ScalableAdmin, SoftDeleteAdmin, input_filter
 from .models import CustomUser, Subscription
 
 
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(SoftDeleteAdmin):
     list_display = (
-        'username', 'email', 'first_name', 'last_name',
+        'username', 'email', 'first_name', 'last_name', 'deleted',
     )
-    list_filter = ('username', 'email')
-    search_fields = ('username',)
+    list_filter = ('is_active', 'is_staff')
+    search_fields = ('^username', '^email')
     empty_value_display = '-пусто-'
 
 
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ScalableAdmin):
     list_display = ('user', 'author',)
-    list_filter = ('user', 'author',)
-    search_fields = ('user', 'author',)
+    list_filter = (
+        input_filter('user', 'подписчику'),
+        input_filter('author', 'автору'),
+    )
+    list_select_related = ('user', 'author')
+    search_fields = ('^user__username', '^author__username',)
+    autocomplete_fields = ('user', 'author')
     empty_value_display = '-пусто-'
 
 
@@ -1,11 +1,20 @@
 from django.conf import settings
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 
 from .validators import validate_username
 
 
+class ActiveUserManager(UserManager):
+    """Пользователи без отметки об удалении."""
+
+    use_in_migrations = False
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted__isnull=True)
+
+
 class CustomUser(AbstractUser):
 
     USERNAME_FIELD = 'email'
@@ -30,9 +39,19 @@ class CustomUser(AbstractUser):
         blank=False,
         max_length=settings.USER_MAX_LENGTH
     )
+    deleted = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ActiveUserManager()
+    all_objects = UserManager()
 
     class Meta:
         ordering = ('username', )
+        indexes = [
+            models.Index(
+                fields=('deleted', ), name='user_deleted_idx',
+                condition=models.Q(deleted__isnull=False),
+            ),
+        ]
 
 
 class Subscription(models.Model):